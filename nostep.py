@@ -1,85 +1,13 @@
 import sys 
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QPushButton, QVBoxLayout, QWidget 
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTableWidget, QTableWidgetItem, QPushButton, QVBoxLayout, QWidget, QComboBox 
 from PyQt5.QtCore import Qt, QTimer 
 from PyQt5.QtGui import QColor 
 import numpy as np
 
-class Node: 
-    def __init__(self, parent=None, position=None): 
-        self.parent = parent 
-        self.position = position 
-        self.g = 0 
-        self.h = 0 
-        self.f = 0
-
-    def __eq__(self, other):
-        return self.position == other.position
-
-def astar(maze, start, end, open_list=None, closed_list=None): 
-    if open_list is None: 
-        open_list = [] 
-    if closed_list is None: 
-        closed_list = []
-
-    if len(open_list) == 0:  # start a new search
-        start_node = Node(None, start)
-        start_node.g = start_node.h = start_node.f = 0
-        end_node = Node(None, end)
-        end_node.g = end_node.h = end_node.f = 0
-        open_list.append(start_node)
-    else:
-        start_node = open_list[0]  # continue from last moved state
-        end_node = Node(None, end)
-
-    if len(open_list) > 0:
-        current_node = open_list[0]
-        current_index = 0
-        for index, item in enumerate(open_list):
-            if item.f < current_node.f:
-                current_node = item
-                current_index = index
-
-        open_list.pop(current_index)
-        closed_list.append(current_node)
-
-        if current_node == end_node:
-            path = []
-            current = current_node
-            while current is not None:
-                path.append(current.position)
-                current = current.parent
-            return path[::-1], current_node.g, current_node, open_list, closed_list  # Return path, cost, end_node, and lists
-
-        children = []
-        for new_position in [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            node_position = (current_node.position[0] + new_position[0], current_node.position[1] + new_position[1])
-
-            if node_position[0] > (len(maze) - 1) or node_position[0] < 0 or node_position[1] > (
-                    len(maze[len(maze) - 1]) - 1) or node_position[1] < 0:
-                continue
-
-            if maze[node_position[0]][node_position[1]] != 0:
-                continue
-            
-            new_node = Node(current_node, node_position)
-            children.append(new_node)
+from planner import ClosedList, ComponentIndex, DStarLite, OpenList, ara, astar, bidirectional, jps, lazy_theta, theta
 
-        for child in children:
-            if child in closed_list:
-                continue
-
-            cost = 14 if abs(child.position[0] - current_node.position[0]) + abs(child.position[1] - current_node.position[1]) == 2 else 10
-            child.g = current_node.g + cost
-            child.h = abs(child.position[0] - end_node.position[0]) + abs(child.position[1] - end_node.position[1])
-            child.f = child.g + child.h
-
-            for open_node in open_list:
-                if child == open_node and child.g >= open_node.g:
-                    break
-            else:
-                open_list.append(child)
-
-    return [], float('inf'), None, open_list, closed_list 
+SEARCHES = {'A*': astar, 'Jump Point Search': jps, 'Bidirectional A*': bidirectional,
+            'Theta*': theta, 'Lazy Theta*': lazy_theta, 'ARA*': ara}  # the any-angle modes only mark the waypoints
 
 class MainWindow(QMainWindow): 
     def __init__(self, *args, **kwargs): 
@@ -87,8 +15,11 @@ class MainWindow(QMainWindow):
         self.table = QTableWidget(10, 10, self) 
         self.find_path_button = QPushButton('Step') 
         self.reset_button = QPushButton('Reset') 
+        self.search_box = QComboBox()  # search mode, see SEARCHES
+        self.search_box.addItems(SEARCHES)
         self.layout = QVBoxLayout() 
         self.layout.addWidget(self.table) 
+        self.layout.addWidget(self.search_box)
         self.layout.addWidget(self.find_path_button) 
         self.layout.addWidget(self.reset_button) 
         self.setCentralWidget(QWidget(self)) 
@@ -96,9 +27,11 @@ class MainWindow(QMainWindow):
         self.start = None 
         self.end = None 
         self.maze = np.zeros((10, 10)) 
-        self.open_list = [] 
-        self.closed_list = [] 
+        self.open_list = OpenList() 
+        self.closed_list = ClosedList() 
         self.path_found = False 
+        self.replanner = None  # D* Lite planner, created on the first change after a path is found
+        self.components = ComponentIndex(self.maze)  # to reject walled-off ends before searching
         self.timer = QTimer(self) 
         # self.timer.setInterval(500) # set time interval to make it faster or slower
         self.timer.timeout.connect(self.step_astar)
@@ -126,16 +59,30 @@ class MainWindow(QMainWindow):
             if (row, column) != self.start and (row, column) != self.end:
                 self.maze[row][column] = 1 if self.maze[row][column] == 0 else 0  #  obstacle
                 self.table.setItem(row, column, QTableWidgetItem())
-                self.table.item(row, column).setBackground(QColor('black') if self.maze[row][column] == 1 else 'white')
+                self.table.item(row, column).setBackground(QColor('black' if self.maze[row][column] == 1 else 'white'))
+                self.components.update_cells([(row, column)])
+                if self.path_found:  # repair the found path instead of searching again
+                    if self.replanner is None:
+                        self.replanner = DStarLite(self.maze, self.start, self.end)
+                    self.replanner.update_cells([(row, column)])
+                    self.path = self.replanner.path()
+                    self.end_node = None  # the step-wise search's parent chain is stale now
+                    self.update_grid()
 
     def start_astar(self):
         if self.start is not None and self.end is not None:
+            if not self.components.connected(self.start, self.end):
+                self.statusBar().showMessage('No path: the end is walled off')
+                return
+            self.statusBar().clearMessage()
             self.find_path_button.setEnabled(False)  # disable  button during search
+            self.search_box.setEnabled(False)  # keep the search mode fixed until it finishes
             self.step_astar()  # start the search process
 
     def step_astar(self):
         if not self.path_found:
-            self.path, cost, end_node, self.open_list, self.closed_list = astar(
+            search = SEARCHES[self.search_box.currentText()]
+            self.path, cost, end_node, self.open_list, self.closed_list = search(
                 self.maze, self.start, self.end, self.open_list, self.closed_list
             )
             if self.path:
@@ -171,15 +118,18 @@ class MainWindow(QMainWindow):
             item.setText(f"g:{node.g}\nh:{node.h}\nf:{node.f}")
 
         if self.path_found:
-            # access end_node from the class attribute
-            current = self.end_node  
             for step in self.path:
                 item = self.table.item(step[0], step[1])
                 item.setBackground(QColor('purple'))
-                item.setText(str(current.g))  # display 'g' cost on the path
+            # access end_node from the class attribute; with jump point search
+            # its parent chain only holds the jump points
+            current = self.end_node
+            while current is not None:
+                self.table.item(*current.position).setText(str(current.g))  # display 'g' cost on the path
                 current = current.parent
             self.timer.stop()
             self.find_path_button.setEnabled(True)  # renable the button
+            self.search_box.setEnabled(True)
         else:
             self.timer.start()
 
@@ -187,10 +137,14 @@ class MainWindow(QMainWindow):
         self.start = None
         self.end = None
         self.maze = np.zeros((10, 10))
-        self.open_list = []
-        self.closed_list = []
+        self.open_list = OpenList()
+        self.closed_list = ClosedList()
         self.path_found = False
+        self.replanner = None
+        self.components = ComponentIndex(self.maze)
+        self.statusBar().clearMessage()
         self.find_path_button.setEnabled(True)
+        self.search_box.setEnabled(True)
         self.timer.stop()
 
         for i in range(10):
@@ -202,7 +156,8 @@ class MainWindow(QMainWindow):
                 item.setBackground(QColor('white'))
                 item.setText('')  # clear text to make it more better
 
-app = QApplication([]) 
-window = MainWindow() 
-window.show() 
-app.exec_()
+if __name__ == '__main__':
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec_()
@@ -0,0 +1,28 @@
+"""
+Headless grid path planning.
+
+Importing this package only pulls in numpy, so the planner can be used in
+server processes and worker pools without PyQt5.
+"""
+from .any_angle import AnyAngleState, lazy_theta, line_of_sight, theta
+from .arastar import AnytimeOpenList, AnytimeSolution, AnytimeState, anytime, ara
+from .batch import BatchResult, QueryPlanner, plan_many
+from .bidirectional_search import BidirectionalClosedList, BidirectionalOpenList, bidirectional
+from .components import ComponentIndex, label_components
+from .core import ClosedList, Node, OpenList, SearchState, astar, find_path, generate_children
+from .cspace import ConfigurationSpace, footprint_kernel, inflate
+from .dstar import DStarLite
+from .flowfield import FlowField, FlowFieldCache
+from .grid import Grid
+from .heuristics import Landmarks, distance_map, manhattan, octile
+from .hpa import HPAResult, HPAStar
+from .ida import BoundedResult, ida_star
+from .jps_plus import JumpPlanner, JumpTable, build_jump_table, save_jump_table
+from .jump_point import jps
+from .mapf import MAPFResult, cbs, ecbs
+from .parallel import ParallelPlanner
+from .postprocess import compress_path, postprocess_path, shortcut_path, spline_path
+from .safe_interval import ObstacleSchedule, sipp
+from .terrain import Terrain
+from .voxel import VoxelGrid, voxel_astar
+from .whca import ReservationTable, WindowedPlanner
@@ -0,0 +1,274 @@
+"""
+Any-angle search with Theta* and Lazy Theta*.
+
+Both search the same 8-connected grid as astar. A cell may also take the
+parent of the cell it was reached from as its own parent, when the
+straight segment between the two is clear. Paths can then run at any
+angle, and they come back as a short list of waypoints instead of every
+cell. Costs are Euclidean distances between cell centres, scaled by 10
+like the grid moves.
+
+A segment is clear when it passes through the interior of no blocked
+cell. A segment through the shared corner of two blocked cells is clear,
+just as generate_children lets diagonal moves cut corners.
+"""
+import math
+
+import numpy as np
+
+from .core import CLOSED, OPEN, ClosedList, OpenList, SearchState, _live_cells, generate_children
+
+
+class AnyAngleState(SearchState):
+    """
+    SearchState with Euclidean (float) costs.
+
+    Line-of-sight checks read the maze passed to each step, like
+    generate_children, so walls added while a search runs are seen.
+    """
+    def __init__(self, maze):
+        super().__init__(np.shape(maze))
+        self.g = self.g.astype(np.float64)
+        self.h = self.h.astype(np.float64)
+        self.f = self.f.astype(np.float64)
+
+    def distance(self, a, b):
+        """Returns the scaled Euclidean distance between two cell ids."""
+        row, col = divmod(int(a), self.cols)
+        other_row, other_col = divmod(int(b), self.cols)
+        return 10 * math.hypot(row - other_row, col - other_col)
+
+
+def line_of_sight(blocked, origin, targets):
+    """
+    Casts rays from one cell to many cells at once.
+
+    The cells a ray passes through are found from where it crosses the
+    grid lines. Along a ray from cell centre to cell centre, the i-th row
+    line is crossed at t = (i + 0.5) / |d_row|, and the same holds for
+    column lines. Sorting those crossings splits the ray into the pieces
+    that lie in a single cell. Every ray is padded to the same number of
+    crossings, so the whole batch is checked in a few array operations.
+
+    Args:
+        blocked: (rows, columns) array, non-zero (or True) where a cell
+            is blocked; a maze can be passed as it is.
+        origin: The (row, column) position the rays start from.
+        targets: Sequence or (k, 2) array of (row, column) positions.
+
+    Returns:
+        A boolean array of length k, True where the segment from origin to
+        the target is clear.
+    """
+    targets = np.asarray(targets, dtype=np.int64).reshape(-1, 2)
+    count = len(targets)
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+    deltas = targets - np.asarray(origin, dtype=np.int64)
+    lengths = np.abs(deltas)
+
+    # row and column line crossings side by side, padded with the end at 1
+    steps = np.arange(lengths.max())
+    crossings = np.where(steps < lengths[:, :, None], (steps + 0.5) / np.maximum(lengths, 1)[:, :, None], 1.0)
+    t = np.empty((count, 2 * len(steps) + 2))
+    t[:, 0], t[:, -1] = 0.0, 1.0
+    t[:, 1:-1] = np.sort(crossings.reshape(count, -1), axis=1)
+
+    # the middle of each piece lies inside one cell; zero-length pieces are
+    # corner crossings or padding and touch no cell interior
+    middle = (t[:, 1:] + t[:, :-1]) / 2
+    piece = t[:, 1:] - t[:, :-1] > 1e-9
+    cells = np.floor(origin + middle[:, :, None] * deltas[:, None, :] + 0.5).astype(np.int64)
+    return ~((blocked[cells[..., 0], cells[..., 1]] != 0) & piece).any(axis=1)
+
+
+def _clear(cells, cols, origin, target):
+    """
+    Checks the line of sight of a single ray with an integer grid walk.
+
+    Gives the same answer as line_of_sight, without the array set-up that
+    dominates the cost of a short batch. The walk steps over whichever
+    grid line the ray crosses next. The crossings at t = (i + 0.5) / |d_row|
+    and t = (j + 0.5) / |d_col| compare exactly as (2i + 1) |d_col| against
+    (2j + 1) |d_row|. When the two are equal the ray passes through a
+    corner and the walk steps diagonally, past the two cells beside it.
+
+    Args:
+        cells: The cells as a flat sequence indexed by cell id, non-zero
+            where blocked, as returned by _cells.
+        cols: The number of columns of the maze.
+        origin: The (row, column) position the ray starts from.
+        target: The (row, column) position the ray ends at.
+
+    Returns:
+        True if the segment from origin to target is clear.
+    """
+    d_row, d_col = target[0] - origin[0], target[1] - origin[1]
+    rows, columns = abs(d_row), abs(d_col)
+    row_step = cols if d_row > 0 else -cols
+    col_step = 1 if d_col > 0 else -1
+    cell = origin[0] * cols + origin[1]
+    if cells[cell]:
+        return False
+    # crossing times scaled by 2 * rows * columns
+    row_crossing, col_crossing = columns, rows
+    i = j = 0
+    while i < rows or j < columns:
+        if j == columns or (i < rows and row_crossing < col_crossing):
+            cell += row_step
+            i += 1
+            row_crossing += 2 * columns
+        elif i == rows or col_crossing < row_crossing:
+            cell += col_step
+            j += 1
+            col_crossing += 2 * rows
+        else:
+            cell += row_step + col_step
+            i += 1
+            j += 1
+            row_crossing += 2 * columns
+            col_crossing += 2 * rows
+        if cells[cell]:
+            return False
+    return True
+
+
+def _cells(state, maze):
+    """Returns the maze as a flat sequence for _clear, sharing the live view of generate_children."""
+    cells = state._cells
+    if cells is None or cells.obj is not maze:
+        cells = state._cells = _live_cells(maze)
+    if cells.view is not None:
+        return cells.view
+    return (np.asarray(maze) != 0).tobytes()  # no view of a list: copied every step
+
+
+def _begin(maze, start, open_list, closed_list):
+    """Returns the state and lists of a new or resumed search."""
+    if open_list is None or len(open_list) == 0:  # start a new search
+        state = AnyAngleState(maze)
+        open_list = OpenList(state)
+        closed_list = ClosedList(state)
+        open_list.push(state.index(start))
+    else:
+        state = open_list.state  # continue from last moved state
+        if closed_list is None:
+            closed_list = ClosedList(state)
+    return state, open_list, closed_list
+
+
+def _update(state, open_list, via, child, end_index):
+    """Offers child a straight segment from via, like core.relax."""
+    g, h, f = state.g, state.h, state.f
+    child_g = g[via] + state.distance(via, child)
+    if state.flags[child] == OPEN:
+        if child_g >= g[child]:
+            return
+        g[child] = child_g
+        f[child] = child_g + h[child]
+        state.parent[child] = via
+        open_list.decrease_key(child)
+    else:
+        g[child] = child_g
+        h[child] = state.distance(child, end_index)
+        f[child] = child_g + h[child]
+        state.parent[child] = via
+        open_list.push(child)
+
+
+def _open_children(state, index, maze):
+    """Returns the ids of the free neighbours of a cell that are not closed."""
+    return [child for child, _ in generate_children(state, index, maze) if state.flags[child] != CLOSED]
+
+
+def theta(maze, start, end, open_list=None, closed_list=None):
+    """
+    Runs one step of Theta*.
+
+    Takes and returns the same values as astar. Each expansion checks the
+    line of sight from the expanded cell's parent to all of its
+    neighbours in one batched call to line_of_sight.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: The cells to be evaluated.
+        closed_list: The cells that have been evaluated.
+
+    Returns:
+        The waypoints of the path from the start to the end, the (float)
+        cost of the path, the end node, and the open and closed lists.
+    """
+    state, open_list, closed_list = _begin(maze, start, open_list, closed_list)
+    end_index = state.index(end)
+
+    if len(open_list) > 0:
+        current = open_list.pop()
+        closed_list.append(current)
+
+        if current == end_index:
+            return state.path(current), float(state.g[current]), state.node(current), open_list, closed_list
+
+        children = _open_children(state, current, maze)
+        origin = state.parent[current]
+        if origin >= 0 and children:
+            positions = np.stack(np.divmod(np.array(children), state.cols), axis=1)
+            clear = line_of_sight(np.asarray(maze), state.position(origin), positions)
+        else:
+            clear = np.zeros(len(children), dtype=bool)
+        for child, visible in zip(children, clear):
+            _update(state, open_list, origin if visible else current, child, end_index)
+
+    return [], float('inf'), None, open_list, closed_list
+
+
+def lazy_theta(maze, start, end, open_list=None, closed_list=None):
+    """
+    Runs one step of Lazy Theta*.
+
+    Takes and returns the same values as astar. Neighbours are optimistically
+    linked to the expanded cell's parent without a check; the single line of
+    sight a cell needs is only cast when it is expanded, and if it is
+    blocked the cell falls back to its best closed grid neighbour. That is
+    one ray per expansion instead of one per generated neighbour, walked
+    with _clear, since a batch of one is mostly array set-up.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: The cells to be evaluated.
+        closed_list: The cells that have been evaluated.
+
+    Returns:
+        The waypoints of the path from the start to the end, the (float)
+        cost of the path, the end node, and the open and closed lists.
+    """
+    state, open_list, closed_list = _begin(maze, start, open_list, closed_list)
+    g, parent, flags = state.g, state.parent, state.flags
+    end_index = state.index(end)
+
+    if len(open_list) > 0:
+        current = open_list.pop()
+        closed_list.append(current)
+
+        origin = parent[current]
+        if origin >= 0 and not _clear(_cells(state, maze), state.cols, divmod(int(origin), state.cols),
+                                      divmod(current, state.cols)):
+            best, best_g = -1, float('inf')
+            for neighbour, _ in generate_children(state, current, maze):
+                if flags[neighbour] == CLOSED and g[neighbour] + state.distance(neighbour, current) < best_g:
+                    best, best_g = neighbour, g[neighbour] + state.distance(neighbour, current)
+            parent[current] = best
+            g[current] = best_g
+            state.f[current] = best_g + state.h[current]
+
+        if current == end_index:
+            return state.path(current), float(g[current]), state.node(current), open_list, closed_list
+
+        origin = parent[current] if parent[current] >= 0 else current
+        for child in _open_children(state, current, maze):
+            _update(state, open_list, origin, child, end_index)
+
+    return [], float('inf'), None, open_list, closed_list
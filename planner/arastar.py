@@ -0,0 +1,214 @@
+"""
+Anytime Repairing A* (ARA*) under a wall-clock budget.
+
+The search starts with a heavily weighted heuristic, f = g + w * h, which
+reaches the end after few expansions with a path at most w times the
+optimal cost. Each time a path is published the weight is lowered and the
+search carries on from the same state: cells whose g improved after they
+were expanded are kept aside (INCONS) and only those are searched again,
+rather than starting over. With w = 1 the path is optimal.
+
+The heuristic is the octile distance, which is admissible for the 10/14
+moves, so the bounds hold.
+"""
+import time
+
+import numpy as np
+
+from .core import CLOSED, NEW, OPEN, ClosedList, OpenList, SearchState, generate_children
+from .heuristics import octile
+
+INCONS = 3  # closed this iteration, but g improved since; searched again next iteration
+
+
+class AnytimeSolution:
+    """
+    Path published by the anytime search.
+
+    Attributes:
+        path: The list of positions from the start to the end.
+        cost: The cost of the path.
+        weight: The heuristic weight of the iteration that found it.
+        bound: The suboptimality bound: cost is at most bound times the
+            optimal cost. 1.0 means the path is optimal.
+        expanded: The number of expansions made up to this path.
+    """
+    def __init__(self, path, cost, weight, bound, expanded):
+        self.path = path
+        self.cost = cost
+        self.weight = weight
+        self.bound = bound
+        self.expanded = expanded
+
+    @property
+    def optimal(self):
+        return self.bound <= 1.0
+
+
+class AnytimeState(SearchState):
+    """
+    SearchState for ARA*: g starts at inf so improved routes to cells seen
+    in an earlier iteration can be told apart, and f holds weighted (float)
+    keys.
+    """
+    def __init__(self, shape):
+        super().__init__(shape)
+        self.g = np.full(self.rows * self.cols, np.inf)
+        self.h = self.h.astype(np.float64)
+        self.f = self.f.astype(np.float64)
+
+
+class AnytimeOpenList(OpenList):
+    """
+    OpenList that also carries the anytime search's progress between steps.
+
+    Attributes:
+        weight: The heuristic weight of the current iteration.
+        decrement: How much the weight drops after each published path.
+        incons: Cell ids flagged INCONS, to be reopened next iteration.
+        solution: The latest AnytimeSolution, or None.
+        expanded: The number of expansions so far, over all iterations.
+    """
+    def __init__(self, state=None, weight=3.0, decrement=0.5):
+        super().__init__(state)
+        self.weight = weight
+        self.decrement = decrement
+        self.incons = []
+        self.solution = None
+        self.expanded = 0
+
+
+def _publish(open_list, closed_list, goal):
+    """Records the path to the goal and starts the next iteration with a lower weight."""
+    state = open_list.state
+    # no cell left to search can lead to the end for less than this
+    remaining = [state.g[index] + state.h[index] for index in open_list.heap + open_list.incons]
+    lower = min(remaining) if remaining else np.inf
+    bound = min(open_list.weight, state.g[goal] / lower) if lower > 0 else open_list.weight
+    open_list.solution = AnytimeSolution(state.path(goal), int(state.g[goal]), open_list.weight,
+                                         max(float(bound), 1.0), open_list.expanded)
+    if open_list.solution.optimal:
+        return
+
+    open_list.weight = max(1.0, open_list.weight - open_list.decrement)
+    for index in closed_list.order:
+        if state.flags[index] == CLOSED:
+            state.flags[index] = NEW
+    closed_list.order = []
+    queued = open_list.heap + open_list.incons
+    open_list.heap, open_list.keys, open_list.incons = [], [], []
+    for index in queued:
+        state.slot[index] = -1
+        state.f[index] = state.g[index] + open_list.weight * state.h[index]
+        open_list.push(index)
+
+
+def _begin(maze, start, end, weight=3.0, decrement=0.5):
+    """Returns the open and closed lists of a new anytime search."""
+    state = AnytimeState(np.shape(maze))
+    open_list = AnytimeOpenList(state, weight, decrement)
+    index = state.index(start)
+    state.g[index] = 0
+    state.h[index] = octile(state.position(index), end)
+    state.f[index] = weight * state.h[index]
+    open_list.push(index)
+    return open_list, ClosedList(state)
+
+
+def ara(maze, start, end, open_list=None, closed_list=None):
+    """
+    Runs one step of ARA*.
+
+    Takes and returns the same values as astar, but the path is only
+    returned once it is proven optimal. The paths published on the way are
+    on open_list.solution; use anytime() to run steps against a deadline.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: An AnytimeOpenList from a previous step.
+        closed_list: The cells expanded in the current iteration.
+
+    Returns:
+        The optimal path from the start to the end, the cost of the path,
+        the end node, and the open and closed lists.
+    """
+    if isinstance(open_list, AnytimeOpenList) and open_list.solution is not None and open_list.solution.optimal:
+        state = open_list.state
+        goal = state.index(end)
+        return open_list.solution.path, open_list.solution.cost, state.node(goal), open_list, closed_list
+    if open_list is None or len(open_list) == 0:  # start a new search
+        open_list, closed_list = _begin(maze, start, end)
+    elif closed_list is None:
+        closed_list = ClosedList(open_list.state)
+
+    state = open_list.state
+    g, h, f, flags = state.g, state.h, state.f, state.flags
+    goal = state.index(end)
+
+    if g[goal] < np.inf and (len(open_list) == 0 or g[goal] <= open_list.keys[0]):
+        _publish(open_list, closed_list, goal)
+        if open_list.solution.optimal:
+            return open_list.solution.path, open_list.solution.cost, state.node(goal), open_list, closed_list
+        return [], float('inf'), None, open_list, closed_list
+
+    if len(open_list) > 0:
+        current = open_list.pop()
+        closed_list.append(current)
+        open_list.expanded += 1
+
+        for child, cost in generate_children(state, current, maze):
+            child_g = g[current] + cost
+            if child_g >= g[child]:
+                continue
+            if g[child] == np.inf:
+                h[child] = octile(state.position(child), end)
+            g[child] = child_g
+            state.parent[child] = current
+
+            if flags[child] == CLOSED:
+                flags[child] = INCONS
+                open_list.incons.append(child)
+            elif flags[child] != INCONS:
+                f[child] = child_g + open_list.weight * h[child]
+                if flags[child] == OPEN:
+                    open_list.decrease_key(child)
+                else:
+                    open_list.push(child)
+
+    return [], float('inf'), None, open_list, closed_list
+
+
+def anytime(maze, start, end, budget, open_list=None, closed_list=None, weight=3.0, decrement=0.5):
+    """
+    Runs ARA* until a deadline and returns the best path found so far.
+
+    Pass the returned lists back in, with a fresh budget, to keep improving
+    the same search in the next control cycle.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        budget: Seconds of wall-clock time to spend.
+        open_list: An AnytimeOpenList from a previous call.
+        closed_list: The closed list from a previous call.
+        weight: The initial heuristic weight, for a new search.
+        decrement: How much the weight drops after each path, for a new
+            search.
+
+    Returns:
+        The latest AnytimeSolution (None if no path was found in time or
+        the end cannot be reached), and the open and closed lists.
+    """
+    deadline = time.perf_counter() + budget
+    if open_list is None:
+        open_list, closed_list = _begin(maze, start, end, weight, decrement)
+    while time.perf_counter() < deadline:
+        if open_list.solution is not None and open_list.solution.optimal:
+            break
+        if len(open_list) == 0 and open_list.state.g[open_list.state.index(end)] == np.inf:
+            break  # the end cannot be reached
+        _, _, _, open_list, closed_list = ara(maze, start, end, open_list, closed_list)
+    return open_list.solution, open_list, closed_list
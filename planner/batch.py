@@ -0,0 +1,155 @@
+"""
+Batch path queries that share one preprocessed maze.
+"""
+from heapq import heappop, heappush
+
+import numpy as np
+
+from .components import label_components
+from .grid import Grid
+from .heuristics import octile
+
+
+class BatchResult:
+    """
+    Paths and costs of a batch of queries in compact array form.
+
+    The cells of all paths are concatenated; path i is
+    cells[offsets[i]:offsets[i + 1]].
+
+    Attributes:
+        costs: float64 array of path costs, inf where the end is unreachable.
+        offsets: int64 array of len(costs) + 1 path boundaries into cells.
+        cells: int32 array of shape (total path length, 2) of positions.
+    """
+    def __init__(self, costs, offsets, cells):
+        self.costs = costs
+        self.offsets = offsets
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.costs)
+
+    def __getitem__(self, i):
+        """Returns the path and cost of query i."""
+        return self.cells[self.offsets[i]:self.offsets[i + 1]], self.costs[i]
+
+
+class QueryPlanner:
+    """
+    A* over a Grid with scratch buffers reused between queries.
+
+    Instead of clearing the buffers, every query bumps a stamp, and a cell's
+    g and parent are only trusted if its `seen` entry carries the current
+    stamp. The buffers are plain lists because the inner loop only does
+    scalar reads and writes, which are much cheaper on lists than on numpy
+    arrays.
+
+    The component labels of the maze are computed up front, so a query
+    whose end lies in another component returns at once instead of
+    expanding everything reachable from the start.
+
+    Attributes:
+        grid: The preprocessed maze.
+        expanded: The number of cells expanded by the last query.
+    """
+    def __init__(self, grid):
+        if not isinstance(grid, Grid):
+            grid = Grid(grid)
+        self.grid = grid
+        size = grid.size
+        self.g = [0] * size
+        self.parent = [-1] * size
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.component = label_components(grid.blocked.reshape(-1, grid.width)).ravel().tolist()
+        self.stamp = 0
+        self.expanded = 0
+
+    def query(self, start, end):
+        """
+        Finds the shortest path between two positions.
+
+        Args:
+            start: The start position.
+            end: The end position.
+
+        Returns:
+            The list of flat padded indices from start to end and the path
+            cost, or an empty list and inf if the end cannot be reached.
+        """
+        grid = self.grid
+        free, neighbours, width = grid.free, grid.neighbours, grid.width
+        g, parent, seen, closed = self.g, self.parent, self.seen, self.closed
+        self.stamp += 1
+        stamp = self.stamp
+        source, target = grid.index(start), grid.index(end)
+        if self.component[target] < 0 or self.component[source] != self.component[target]:
+            self.expanded = 0
+            return [], float('inf')
+        target_position = divmod(target, width)
+
+        seen[source] = stamp
+        g[source] = 0
+        parent[source] = -1
+        heap = [(0, source)]
+        expanded = 0
+        while heap:
+            _, current = heappop(heap)
+            if closed[current] == stamp:
+                continue  # stale entry superseded by a cheaper push
+            closed[current] = stamp
+            expanded += 1
+
+            if current == target:
+                self.expanded = expanded
+                path = []
+                while current >= 0:
+                    path.append(current)
+                    current = parent[current]
+                return path[::-1], g[target]
+
+            current_g = g[current]
+            for offset, cost in neighbours:
+                child = current + offset
+                if not free[child] or closed[child] == stamp:
+                    continue
+                child_g = current_g + cost
+                if seen[child] == stamp and child_g >= g[child]:
+                    continue
+                seen[child] = stamp
+                g[child] = child_g
+                parent[child] = current
+                heappush(heap, (child_g + octile(divmod(child, width), target_position), child))
+
+        self.expanded = expanded
+        return [], float('inf')
+
+
+def plan_many(maze, pairs):
+    """
+    Plans paths for many (start, end) pairs on the same maze.
+
+    The padding, obstacle bitmap, neighbour table and scratch buffers are
+    built once and shared by all queries.
+
+    Args:
+        maze: The grid, or a Grid built from it.
+        pairs: Iterable of (start, end) position pairs, or an array of shape
+            (n, 2, 2).
+
+    Returns:
+        A BatchResult with the path and cost of every pair, in order.
+    """
+    planner = QueryPlanner(maze)
+    costs = []
+    offsets = [0]
+    indices = []
+    for start, end in pairs:
+        path, cost = planner.query(start, end)
+        costs.append(cost)
+        indices.extend(path)
+        offsets.append(len(indices))
+
+    return BatchResult(np.asarray(costs, dtype=np.float64), np.asarray(offsets, dtype=np.int64),
+                       planner.grid.positions(indices))
@@ -0,0 +1,169 @@
+"""
+Bidirectional A*: one search forward from the start and one backward from
+the end, expanded alternately until the best meeting found so far is
+provably optimal.
+"""
+from heapq import heappop, heappush
+from itertools import chain
+
+import numpy as np
+
+from .core import CLOSED, NEW, OPEN, ClosedList, OpenList, SearchState, generate_children, relax
+
+# cheapest move; any path still undiscovered joins the frontiers with at least one
+MIN_COST = 10
+
+
+class BidirectionalOpenList:
+    """
+    Open lists of the forward and backward searches.
+
+    Iterating yields the nodes of both frontiers. The length is zero once
+    either frontier is exhausted, since no path can be found after that.
+
+    Attributes:
+        forward: The OpenList of the search from the start.
+        backward: The OpenList of the search from the end.
+        best: The cost of the cheapest start-to-end path seen so far.
+        meeting: The cell id where that path joins the two searches, or -1.
+        turn: 0 if the forward search expands next, 1 for the backward one.
+        by_g: Per direction, a lazy heap of (g, cell id) of the open cells,
+            for the lowest g of each frontier.
+    """
+    def __init__(self, forward=None, backward=None):
+        self.forward = forward
+        self.backward = backward
+        self.best = float('inf')
+        self.meeting = -1
+        self.turn = 0
+        self.by_g = ([], [])
+
+    def __len__(self):
+        if self.forward is None or len(self.forward) == 0 or len(self.backward) == 0:
+            return 0
+        return len(self.forward) + len(self.backward)
+
+    def __iter__(self):
+        if self.forward is None:
+            return iter(())
+        return chain(self.forward, self.backward)
+
+
+class BidirectionalClosedList:
+    """
+    Closed lists of the forward and backward searches.
+
+    Attributes:
+        forward: The ClosedList of the search from the start.
+        backward: The ClosedList of the search from the end.
+    """
+    def __init__(self, forward=None, backward=None):
+        self.forward = forward
+        self.backward = backward
+
+    def __len__(self):
+        return 0 if self.forward is None else len(self.forward) + len(self.backward)
+
+    def __iter__(self):
+        if self.forward is None:
+            return iter(())
+        return chain(self.forward, self.backward)
+
+
+def _lowest_g(queue, by_g):
+    """Returns the lowest g on an open list, dropping stale by_g entries."""
+    state = queue.state
+    while by_g and (state.flags[by_g[0][1]] != OPEN or state.g[by_g[0][1]] != by_g[0][0]):
+        heappop(by_g)
+    return by_g[0][0] if by_g else float('inf')
+
+
+def _stitch(open_list):
+    """Hooks the backward chain from the meeting cell onto the forward state."""
+    forward, backward = open_list.forward.state, open_list.backward.state
+    meeting = open_list.meeting
+    total = forward.g[meeting] + backward.g[meeting]
+    current = meeting
+    while backward.parent[current] >= 0:
+        following = backward.parent[current]
+        forward.parent[following] = current
+        forward.g[following] = total - backward.g[following]
+        forward.f[following] = forward.g[following] + forward.h[following]
+        current = following
+    return forward.path(current), int(forward.g[current]), forward.node(current)
+
+
+def bidirectional(maze, start, end, open_list=None, closed_list=None):
+    """
+    Runs one step of bidirectional A*.
+
+    Takes and returns the same values as astar. Each step expands one node
+    of the forward or the backward search, in turn. The search stops once
+    the best meeting cost is no more than either frontier's lowest f, or
+    than the two frontiers' lowest g plus one move; no undiscovered path can
+    be cheaper than any of these, so the result stays optimal.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: A BidirectionalOpenList from a previous step.
+        closed_list: A BidirectionalClosedList from a previous step.
+
+    Returns:
+        The shortest path from the start to the end, the cost of the path,
+        the end node, and the open and closed lists. The end node's parent
+        chain runs back through the meeting cell to the start.
+    """
+    if open_list is None or len(open_list) == 0:  # start a new search
+        forward, backward = SearchState(np.shape(maze)), SearchState(np.shape(maze))
+        open_list = BidirectionalOpenList(OpenList(forward), OpenList(backward))
+        closed_list = BidirectionalClosedList(ClosedList(forward), ClosedList(backward))
+        if maze[end[0]][end[1]] != 0:
+            # astar never reaches a blocked end; seeding the backward search
+            # from it would let the two searches meet through the wall
+            return [], float('inf'), None, open_list, closed_list
+        open_list.forward.push(forward.index(start))
+        open_list.backward.push(backward.index(end))
+        open_list.by_g[0].append((0, forward.index(start)))
+        open_list.by_g[1].append((0, backward.index(end)))
+    elif closed_list is None:
+        closed_list = BidirectionalClosedList(ClosedList(open_list.forward.state),
+                                              ClosedList(open_list.backward.state))
+
+    if open_list.turn == 0:
+        queue, closed, other, target = open_list.forward, closed_list.forward, open_list.backward.state, end
+    else:
+        queue, closed, other, target = open_list.backward, closed_list.backward, open_list.forward.state, start
+    by_g = open_list.by_g[open_list.turn]
+    open_list.turn = 1 - open_list.turn
+    state = queue.state
+
+    if len(queue) > 0:
+        current = queue.pop()
+        closed.append(current)
+        if other.flags[current] != NEW and state.g[current] + other.g[current] < open_list.best:
+            open_list.best = int(state.g[current] + other.g[current])
+            open_list.meeting = current
+
+        for child, cost in generate_children(state, current, maze):
+            if state.flags[child] == CLOSED:
+                continue
+
+            child_g = state.g[current] + cost
+            relax(state, queue, current, child, child_g, target)
+            if state.g[child] == child_g:
+                heappush(by_g, (int(child_g), child))
+            if other.flags[child] != NEW and state.g[child] + other.g[child] < open_list.best:
+                open_list.best = int(state.g[child] + other.g[child])
+                open_list.meeting = child
+
+    lowest_f = [queue.keys[0] if len(queue) > 0 else float('inf')
+                for queue in (open_list.forward, open_list.backward)]
+    lowest_g = [_lowest_g(queue, by_g) for queue, by_g in zip((open_list.forward, open_list.backward), open_list.by_g)]
+    bound = max(lowest_f[0], lowest_f[1], lowest_g[0] + lowest_g[1] + MIN_COST)
+    if open_list.meeting >= 0 and open_list.best <= bound:
+        path, cost, end_node = _stitch(open_list)
+        return path, cost, end_node, open_list, closed_list
+
+    return [], float('inf'), None, open_list, closed_list
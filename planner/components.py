@@ -0,0 +1,165 @@
+"""
+Connected components of the free cells, for rejecting unreachable ends.
+
+A search towards an end in another component has to expand every cell it
+can reach before it gives up. Comparing component labels answers the same
+question in constant time. Components are 8-connected like the moves of
+generate_children, diagonals past corners included.
+"""
+import numpy as np
+
+# the four moves that, with their opposites, join all 8-connected pairs
+_HALF_MOVES = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+def label_components(blocked):
+    """
+    Labels the 8-connected components of the free cells.
+
+    Every pair of adjacent free cells is an edge. Each round hooks the root
+    of the larger label under the smaller one for every edge whose ends
+    still disagree, then shortcuts the parent pointers until each points at
+    its root. All of it is whole-array numpy work. Maps take only a few
+    rounds, since each round merges along every edge at once.
+
+    Args:
+        blocked: Boolean (rows, columns) array, True for obstacles.
+
+    Returns:
+        An int64 (rows, columns) array holding, for each free cell, the
+        smallest flat index in its component, and -1 for blocked cells.
+    """
+    blocked = np.asarray(blocked, dtype=bool)
+    rows, cols = blocked.shape
+    free = ~blocked
+    ids = np.arange(rows * cols).reshape(rows, cols)
+    sources, targets = [], []
+    for d_row, d_col in _HALF_MOVES:
+        col0, col1 = max(0, -d_col), cols - max(0, d_col)
+        here = (slice(0, rows - d_row), slice(col0, col1))
+        there = (slice(d_row, rows), slice(col0 + d_col, col1 + d_col))
+        both = free[here] & free[there]
+        sources.append(ids[here][both])
+        targets.append(ids[there][both])
+    a, b = np.concatenate(sources), np.concatenate(targets)
+
+    parent = np.arange(rows * cols)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        differ = root_a != root_b
+        if not differ.any():
+            break
+        a, b, root_a, root_b = a[differ], b[differ], root_a[differ], root_b[differ]
+        parent[np.maximum(root_a, root_b)] = np.minimum(root_a, root_b)
+        while True:
+            shortcut = parent[parent]
+            if np.array_equal(shortcut, parent):
+                break
+            parent = shortcut
+    return np.where(free, parent.reshape(rows, cols), -1)
+
+
+class ComponentIndex:
+    """
+    Component labels of a maze, kept up to date as cells change.
+
+    Opening a cell merges the components around it by recording the merge,
+    in constant time. Closing a cell can only split its component when its
+    free neighbours are not connected among themselves; only then is that
+    one component relabelled, inside its bounding box.
+
+    The index keeps a reference to the maze: after changing cells in
+    place, pass their positions to update_cells(), as with DStarLite.
+
+    Attributes:
+        maze: The grid the index watches.
+        labels: The label of each cell, -1 for blocked cells. Labels that
+            were merged are resolved through find().
+    """
+    def __init__(self, maze):
+        self.maze = maze
+        self.labels = label_components(np.asarray(maze) != 0)
+        self._merged = {}  # label: label it was merged into
+        self._next = self.labels.size  # first label not used by label_components
+
+    def find(self, label):
+        """Returns the label a (possibly merged) label stands for now."""
+        merged = self._merged
+        root = label
+        while root in merged:
+            root = merged[root]
+        while label != root:  # path compression
+            merged[label], label = root, merged[label]
+        return root
+
+    def component(self, position):
+        """Returns the component label of a cell, or -1 if it is blocked."""
+        label = self.labels[position[0], position[1]]
+        return -1 if label < 0 else self.find(int(label))
+
+    def connected(self, start, end):
+        """Checks if a path between two cells can exist."""
+        label = self.component(start)
+        return label >= 0 and label == self.component(end)
+
+    def _free_neighbours(self, position):
+        rows, cols = self.labels.shape
+        row, col = position
+        return [(row + d_row, col + d_col) for d_row in (-1, 0, 1) for d_col in (-1, 0, 1)
+                if (d_row or d_col) and 0 <= row + d_row < rows and 0 <= col + d_col < cols
+                and self.labels[row + d_row, col + d_col] >= 0]
+
+    def update_cells(self, cells):
+        """
+        Tells the index which cells of the maze changed.
+
+        Args:
+            cells: Iterable of (row, column) positions whose value in the
+                maze changed since the last call.
+        """
+        for position in cells:
+            position = (int(position[0]), int(position[1]))
+            free = self.maze[position[0]][position[1]] == 0
+            if free != (self.labels[position] >= 0):
+                if free:
+                    self._open(position)
+                else:
+                    self._close(position)
+
+    def _open(self, position):
+        roots = {self.component(neighbour) for neighbour in self._free_neighbours(position)}
+        if not roots:
+            self.labels[position] = self._next
+            self._next += 1
+            return
+        label = min(roots)
+        for root in roots - {label}:
+            self._merged[root] = label
+        self.labels[position] = label
+
+    def _close(self, position):
+        label = self.component(position)
+        self.labels[position] = -1
+        neighbours = self._free_neighbours(position)
+
+        # the component survives if the neighbours still reach each other
+        # around the closed cell
+        reached, frontier = {neighbours[0]} if neighbours else set(), neighbours[:1]
+        while frontier:
+            row, col = frontier.pop()
+            for other in neighbours:
+                if other not in reached and abs(other[0] - row) <= 1 and abs(other[1] - col) <= 1:
+                    reached.add(other)
+                    frontier.append(other)
+        if len(reached) == len(neighbours):
+            return
+
+        members = [label] + [old for old in list(self._merged) if self.find(old) == label]
+        for old in members[1:]:
+            del self._merged[old]
+        mask = np.isin(self.labels, members)
+        rows, cols = np.nonzero(mask)
+        box = (slice(rows.min(), rows.max() + 1), slice(cols.min(), cols.max() + 1))
+        inside = mask[box]
+        self.labels[box][inside] = label_components(~inside)[inside] + self._next
+        self._next += inside.size
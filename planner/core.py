@@ -0,0 +1,391 @@
+"""
+Grid A* search without any GUI dependencies.
+
+The maze is a 2D numpy array where 0 is a free cell and anything else is
+an obstacle. Moves go to the eight neighbouring cells and cost 10
+(straight) or 14 (diagonal), or are weighted by a per-cell cost layer
+when astar is given a Terrain (see planner.terrain).
+"""
+import numpy as np
+
+from .heuristics import octile
+
+NEW, OPEN, CLOSED = 0, 1, 2  # per-cell search flags
+
+MOVES = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+class SearchState:
+    """
+    Structure-of-arrays state of one search over a maze.
+
+    Every per-cell value lives in a flat numpy array indexed by the cell id
+    row * cols + col, so a search allocates a handful of arrays up front
+    instead of one Node object per generated neighbour.
+
+    Attributes:
+        rows: The number of rows of the maze.
+        cols: The number of columns of the maze.
+        g: The cost from the start to each cell.
+        h: The heuristic estimate from each cell to the end.
+        f: The sum of g and h.
+        parent: The cell id each cell was reached from, or -1.
+        flags: NEW, OPEN or CLOSED for each cell.
+        slot: The position of each queued cell in the open heap, or -1.
+        heuristic: The heuristic(position, end) that fills in h.
+        inside: Bytes of the grid padded with a one-cell border, 1 inside
+            the maze and 0 on the border, for bounds-free neighbour tests.
+        moves: (padded offset, cell id offset, cost) of the eight moves.
+    """
+    def __init__(self, shape, heuristic=octile, dtype=np.int64):
+        self.rows, self.cols = shape
+        self.heuristic = heuristic
+        size = self.rows * self.cols
+        self.g = np.zeros(size, dtype=dtype)  # float64 for terrain costs
+        self.h = np.zeros(size, dtype=dtype)
+        self.f = np.zeros(size, dtype=dtype)
+        self.parent = np.full(size, -1, dtype=np.int64)
+        self.flags = np.zeros(size, dtype=np.uint8)
+        self.slot = np.full(size, -1, dtype=np.int64)
+        width = self.cols + 2
+        inside = np.zeros((self.rows + 2, width), dtype=np.uint8)
+        inside[1:-1, 1:-1] = 1
+        self.inside = inside.tobytes()
+        self._cells = None  # live flat view of the maze, see generate_children
+        self.moves = [(d_row * width + d_col, d_row * self.cols + d_col, 14 if d_row and d_col else 10)
+                      for d_row, d_col in MOVES]
+
+    def index(self, position):
+        """Returns the cell id of a (row, column) position."""
+        return position[0] * self.cols + position[1]
+
+    def position(self, index):
+        """Returns the (row, column) position of a cell id."""
+        return divmod(int(index), self.cols)
+
+    def node(self, index):
+        """Returns a Node view of a cell id."""
+        return Node(self, index)
+
+    def path(self, index):
+        """Returns the positions from the start to the cell id."""
+        path = []
+        while index >= 0:
+            path.append(self.position(index))
+            index = self.parent[index]
+        return path[::-1]
+
+
+class Node:
+    """
+    Read-only view of one cell of a SearchState.
+
+    Views are only created on demand (for the GUI and the returned end
+    node); the search itself works on the state arrays directly.
+
+    Attributes:
+        state: The search state the cell belongs to.
+        index: The cell id.
+    """
+    __slots__ = ('state', 'index')
+
+    def __init__(self, state, index):
+        self.state = state
+        self.index = int(index)
+
+    @property
+    def position(self):
+        return self.state.position(self.index)
+
+    @property
+    def parent(self):
+        parent = self.state.parent[self.index]
+        return None if parent < 0 else Node(self.state, parent)
+
+    @property
+    def g(self):
+        return self.state.g[self.index].item()
+
+    @property
+    def h(self):
+        return self.state.h[self.index].item()
+
+    @property
+    def f(self):
+        return self.state.f[self.index].item()
+
+    def __eq__(self, other):
+        """Checks if this node is equal to another node (based on their positions)."""
+        return self.position == other.position
+
+
+class ClosedList:
+    """
+    Evaluated cells in expansion order.
+
+    Membership is read from the CLOSED flag of the search state, so
+    `node in closed_list` is constant time.
+    """
+    def __init__(self, state=None):
+        self.state = state
+        self.order = []
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return (Node(self.state, index) for index in self.order)
+
+    def __contains__(self, node):
+        return self.state is not None and self.state.flags[self.state.index(node.position)] == CLOSED
+
+    def append(self, index):
+        self.state.flags[index] = CLOSED
+        self.order.append(index)
+
+
+class OpenList:
+    """
+    Binary min-heap of cell ids keyed on f.
+
+    The heap slot of every queued cell is kept in the state's `slot` array,
+    which gives constant-time membership tests and lets a queued cell have
+    its key lowered in place (decrease-key) instead of pushing a duplicate.
+    """
+    def __init__(self, state=None):
+        self.state = state
+        self.heap = []  # cell ids
+        self.keys = []  # f of the cell at the same heap slot, as a Python number
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __iter__(self):
+        return (Node(self.state, index) for index in self.heap)
+
+    def __contains__(self, node):
+        return self.state is not None and self.state.flags[self.state.index(node.position)] == OPEN
+
+    def push(self, index):
+        self.state.flags[index] = OPEN
+        self.heap.append(index)
+        self.keys.append(self.state.f[index].item())
+        self.state.slot[index] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def pop(self):
+        """Removes and returns the cell id with the lowest f."""
+        index = self.heap[0]
+        last, last_key = self.heap.pop(), self.keys.pop()
+        self.state.slot[index] = -1
+        if self.heap:
+            self.heap[0], self.keys[0] = last, last_key
+            self.state.slot[last] = 0
+            self._sift_down(0)
+        return index
+
+    def decrease_key(self, index):
+        """Restores heap order after f[index] was lowered in place."""
+        slot = int(self.state.slot[index])
+        self.keys[slot] = self.state.f[index].item()
+        self._sift_up(slot)
+
+    def _swap(self, i, j):
+        heap, keys, slot = self.heap, self.keys, self.state.slot
+        heap[i], heap[j] = heap[j], heap[i]
+        keys[i], keys[j] = keys[j], keys[i]
+        slot[heap[i]] = i
+        slot[heap[j]] = j
+
+    def _sift_up(self, i):
+        keys = self.keys
+        while i > 0:
+            parent = (i - 1) >> 1
+            if keys[i] >= keys[parent]:
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        keys = self.keys
+        n = len(keys)
+        while True:
+            smallest = i
+            left = 2 * i + 1
+            right = left + 1
+            if left < n and keys[left] < keys[smallest]:
+                smallest = left
+            if right < n and keys[right] < keys[smallest]:
+                smallest = right
+            if smallest == i:
+                break
+            self._swap(i, smallest)
+            i = smallest
+
+
+def generate_children(state, index, maze):
+    """
+    Generates the children of a cell.
+
+    Bounds come from the state's padded `inside` bytes, so every neighbour
+    is a plain int offset away and needs no bounds check. The cell values
+    are read from the maze itself, through a flat memoryview when it is a
+    contiguous numpy array, so a search resumed after cells changed sees
+    the change. With eight moves, int arithmetic beats a numpy gather,
+    whose call overhead alone costs more than the whole loop.
+
+    Args:
+        state: The search state.
+        index: The cell id to generate the children for.
+        maze: The grid.
+
+    Returns:
+        A list of (child cell id, move cost) pairs for the free neighbours.
+    """
+    cells = state._cells
+    if cells is None or cells.obj is not maze:
+        cells = state._cells = _live_cells(maze)
+    cols, view = state.cols, cells.view
+    row, col = divmod(index, cols)
+    if view is not None and 0 < row < state.rows - 1 and 0 < col < cols - 1:
+        # away from the edges every neighbour is inside the maze
+        return [(index + step, cost) for _, step, cost in state.moves if not view[index + step]]
+    inside = state.inside
+    # padded index: (row + 1) * (cols + 2) + col + 1
+    padded = index + 2 * row + cols + 3
+    if view is not None:
+        return [(index + step, cost) for offset, step, cost in state.moves
+                if inside[padded + offset] and not view[index + step]]
+    return [(index + step, cost) for offset, step, cost in state.moves
+            if inside[padded + offset] and maze[(index + step) // cols][(index + step) % cols] == 0]
+
+
+class _LiveCells:
+    """A maze and, when it is a contiguous numpy array, a flat memoryview sharing its memory."""
+    __slots__ = ('obj', 'view')
+
+    def __init__(self, obj, view):
+        self.obj = obj
+        self.view = view
+
+
+def _live_cells(maze):
+    if isinstance(maze, np.ndarray) and maze.flags.c_contiguous and maze.dtype != object:
+        return _LiveCells(maze, memoryview(maze.reshape(-1)))
+    return _LiveCells(maze, None)
+
+
+def relax(state, open_list, current, child, child_g, end):
+    """
+    Offers a route to child through current with cost child_g.
+
+    A new cell is pushed on the open list; a queued cell is only updated
+    (decrease-key) if the route is cheaper than the one it already has.
+
+    Args:
+        state: The search state.
+        open_list: The open list of the search.
+        current: The cell id being expanded.
+        child: The cell id reached from current.
+        child_g: The cost from the start to child through current.
+        end: The end position, for the heuristic.
+    """
+    g, h, f = state.g, state.h, state.f
+    if state.flags[child] == OPEN:
+        if child_g >= g[child]:
+            return
+        g[child] = child_g
+        f[child] = child_g + h[child]
+        state.parent[child] = current
+        open_list.decrease_key(child)  # cheaper route to a queued cell
+    else:
+        g[child] = child_g
+        h[child] = state.heuristic(state.position(child), end)
+        f[child] = child_g + h[child]
+        state.parent[child] = current
+        open_list.push(child)
+
+
+def astar(maze, start, end, open_list=None, closed_list=None, heuristic=octile, terrain=None):
+    """
+    Runs one step of the A* search algorithm.
+
+    Pass the returned open and closed lists back in to continue the same
+    search; an empty or missing open list starts a new one.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: The cells to be evaluated.
+        closed_list: The cells that have been evaluated.
+        heuristic: The heuristic of a new search, octile by default; see
+            planner.heuristics. A resumed search keeps its own.
+        terrain: A Terrain of the maze, for weighted move costs. The
+            heuristic is scaled to its cheapest cell so it stays
+            admissible. Pass the same terrain on every step.
+
+    Returns:
+        The shortest path from the start to the end, the cost of the path,
+        the end node, and the open and closed lists. The path is empty and
+        the cost infinite until the end has been reached.
+    """
+    if open_list is None or len(open_list) == 0:  # start a new search
+        if terrain is None:
+            state = SearchState(np.shape(maze), heuristic)
+        else:
+            state = SearchState(terrain.shape, terrain.scaled(heuristic), np.float64)
+        open_list = OpenList(state)
+        closed_list = ClosedList(state)
+        open_list.push(state.index(start))
+    else:
+        state = open_list.state  # continue from last moved state
+        if closed_list is None:
+            closed_list = ClosedList(state)
+
+    g, flags = state.g, state.flags
+    end_index = state.index(end)
+
+    if len(open_list) > 0:
+        current = open_list.pop()
+        closed_list.append(current)
+
+        if current == end_index:
+            return state.path(current), g[current].item(), state.node(current), open_list, closed_list
+
+        if terrain is None:
+            children = generate_children(state, current, maze)
+        else:
+            children = terrain.children(state, current)
+        for child, cost in children:
+            if flags[child] == CLOSED:
+                continue
+
+            relax(state, open_list, current, child, g[current] + cost, end)
+
+    return [], float('inf'), None, open_list, closed_list
+
+
+def find_path(maze, start, end, search=astar, components=None):
+    """
+    Runs a step-wise search to completion.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        search: The step function to run, astar or one with the same
+            signature such as jps.
+        components: A ComponentIndex of the maze. An end in another
+            component is rejected without searching.
+
+    Returns:
+        The shortest path from the start to the end and its cost, or an
+        empty path and an infinite cost if the end cannot be reached.
+    """
+    if components is not None and not components.connected(start, end):
+        return [], float('inf')
+    path, cost, _, open_list, closed_list = search(maze, start, end)
+    while not path and len(open_list) > 0:
+        path, cost, _, open_list, closed_list = search(maze, start, end, open_list, closed_list)
+    return path, cost
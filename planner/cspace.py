@@ -0,0 +1,151 @@
+"""
+Configuration space: obstacles inflated by the footprint of a robot.
+
+The planners treat the robot as a single cell. A robot that covers more
+than that fits wherever its reference cell is free in the inflated maze:
+a cell is blocked there if the footprint placed on it would overlap an
+obstacle or leave the map. Inflating once per map and footprint replaces
+a footprint-sized collision check in every expansion with the usual
+single-cell check, and every planner can use the result as its maze.
+
+The footprint is either a radius in cells (a disc of cell centres within
+that distance) or a boolean kernel centred on the reference cell. The
+dilation takes each kernel row apart into runs of set cells. A running
+sum along the rows gives the number of obstacles under every run
+position at once. Shifting those counts by the row offset and OR-ing
+them gives the result in a few whole-array operations per kernel row,
+however wide the runs are.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from .core import astar, find_path
+
+
+def footprint_kernel(radius):
+    """
+    Returns the boolean kernel of a disc footprint.
+
+    Args:
+        radius: The radius in cells; cells whose centre lies within it
+            of the reference cell's centre are covered.
+
+    Returns:
+        A (2k + 1, 2k + 1) boolean array with the reference cell in the
+        middle.
+    """
+    reach = int(radius)
+    offsets = np.arange(-reach, reach + 1)
+    return offsets[:, None] ** 2 + offsets[None, :] ** 2 <= radius * radius
+
+
+def inflate(maze, footprint):
+    """
+    Blocks every cell where the footprint would overlap an obstacle.
+
+    Args:
+        maze: The grid; non-zero cells are obstacles.
+        footprint: A radius in cells, or a boolean kernel with odd sides
+            centred on the reference cell.
+
+    Returns:
+        A uint8 (rows, columns) grid, 1 where the robot cannot stand.
+    """
+    kernel = footprint_kernel(footprint) if np.isscalar(footprint) else np.asarray(footprint, dtype=bool)
+    rows, cols = np.shape(maze)
+    reach_row, reach_col = kernel.shape[0] // 2, kernel.shape[1] // 2
+    # off the map counts as blocked, like the wall border of Grid
+    blocked = np.pad(np.asarray(maze) != 0, ((reach_row, reach_row), (reach_col, reach_col)), constant_values=True)
+    counts = np.zeros((blocked.shape[0], blocked.shape[1] + 1), dtype=np.int32)
+    np.cumsum(blocked, axis=1, out=counts[:, 1:])
+
+    inflated = np.zeros((rows, cols), dtype=bool)
+    for d_row, line in enumerate(kernel):
+        # runs of set cells, as [first, last + 1) column offsets from the left edge
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], line.astype(np.int8), [0]])))
+        band = counts[d_row:d_row + rows]
+        for first, stop in zip(edges[::2], edges[1::2]):
+            inflated |= band[:, stop:stop + cols] > band[:, first:first + cols]
+    return inflated.astype(np.uint8)
+
+
+class ConfigurationSpace:
+    """
+    Inflated copies of one maze, built on demand and kept per footprint.
+
+    The cache keeps a reference to the maze: after changing cells in place,
+    pass their positions to update_cells(), as with FlowFieldCache. That
+    bumps the map version, and grids of older versions are never returned.
+
+    Attributes:
+        maze: The grid the inflated copies are built from.
+        max_grids: The number of footprints to keep grids for; the least
+            recently used grid is dropped first.
+        version: The map version, bumped by every change.
+    """
+    def __init__(self, maze, max_grids=8):
+        self.maze = maze
+        self.max_grids = max_grids
+        self.version = 0
+        self._grids = OrderedDict()  # (version, footprint key): inflated grid
+
+    def __len__(self):
+        return len(self._grids)
+
+    @staticmethod
+    def _key(footprint):
+        if np.isscalar(footprint):
+            return float(footprint)
+        footprint = np.asarray(footprint, dtype=bool)
+        return footprint.shape, footprint.tobytes()
+
+    def get(self, footprint):
+        """
+        Returns the maze inflated by a footprint, inflating it if needed.
+
+        The grid is read-only, since it is shared by every caller with the
+        same footprint.
+        """
+        key = (self.version, self._key(footprint))
+        grid = self._grids.get(key)
+        if grid is None:
+            grid = self._grids[key] = inflate(self.maze, footprint)
+            grid.flags.writeable = False
+            if len(self._grids) > self.max_grids:
+                self._grids.popitem(last=False)
+        else:
+            self._grids.move_to_end(key)
+        return grid
+
+    def find_path(self, start, end, footprint, search=astar):
+        """
+        Plans a path for a robot of the given footprint.
+
+        Args:
+            start: The start position of the reference cell.
+            end: The end position of the reference cell.
+            footprint: A radius in cells, or a boolean kernel.
+            search: The step-wise search to run, as for find_path.
+
+        Returns:
+            The path of the reference cell and its cost, or an empty path
+            and inf if the robot cannot get there.
+        """
+        return find_path(self.get(footprint), start, end, search)
+
+    def update_cells(self, cells):
+        """
+        Tells the cache which cells of the maze changed.
+
+        Args:
+            cells: Iterable of (row, column) positions whose value in the
+                maze changed.
+        """
+        if list(cells):
+            self.clear()
+
+    def clear(self):
+        """Drops every grid, for a maze that was replaced or changed wholesale."""
+        self._grids.clear()
+        self.version += 1
@@ -0,0 +1,177 @@
+"""
+Incremental replanning with D* Lite.
+
+D* Lite searches backwards from the end, so the g-values it keeps are
+costs-to-go. When cells of the maze change, only the vertices whose
+costs actually change are put back on the queue, and the repair touches
+the affected region instead of the whole map. The start can move along
+the path between repairs, as an agent does while it drives the route.
+"""
+from heapq import heappop, heappush
+
+from .grid import Grid
+from .heuristics import octile
+
+INF = float('inf')
+
+
+class DStarLite:
+    """
+    D* Lite over the 8-connected 10/14 grid.
+
+    The planner keeps a reference to the maze: after changing cells in
+    place, pass their positions to update_cells().
+
+    Attributes:
+        maze: The grid the planner watches.
+        grid: The padded Grid the search runs on.
+        start: The current start position.
+        end: The end position.
+        expanded: The number of vertices expanded since the planner was
+            created.
+    """
+    def __init__(self, maze, start, end):
+        self.maze = maze
+        self.grid = Grid(maze)
+        self.free = bytearray(self.grid.free)
+        size = self.grid.size
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.queued = [None] * size  # key each vertex is queued with, or None
+        self.queue = []
+        self.km = 0
+        self.start = tuple(start)
+        self.end = tuple(end)
+        self._start = self.grid.index(start)
+        self._goal = self.grid.index(end)
+        self.expanded = 0
+
+        self.rhs[self._goal] = 0
+        self._push(self._goal, self._key(self._goal))
+
+    def _heuristic(self, a, b):
+        width = self.grid.width
+        return octile(divmod(a, width), divmod(b, width))
+
+    def _key(self, s):
+        best = min(self.g[s], self.rhs[s])
+        return best + self._heuristic(self._start, s) + self.km, best
+
+    def _push(self, s, key):
+        self.queued[s] = key
+        heappush(self.queue, (key, s))
+
+    def _update_vertex(self, u):
+        free, g = self.free, self.g
+        if u != self._goal:
+            best = INF
+            if free[u]:
+                for offset, cost in self.grid.neighbours:
+                    s = u + offset
+                    if free[s] and cost + g[s] < best:
+                        best = cost + g[s]
+            self.rhs[u] = best
+        if g[u] != self.rhs[u]:
+            self._push(u, self._key(u))
+        else:
+            self.queued[u] = None
+
+    def compute_path(self):
+        """
+        Repairs the g-values until the start's cost-to-go is settled.
+
+        Returns:
+            The cost of the shortest path from the start, inf if there is none.
+        """
+        g, rhs, queue, queued = self.g, self.rhs, self.queue, self.queued
+        neighbours = self.grid.neighbours
+        start = self._start
+        while queue:
+            key, u = queue[0]
+            if queued[u] != key:
+                heappop(queue)  # stale entry
+                continue
+            if key >= self._key(start) and rhs[start] == g[start]:
+                break
+            heappop(queue)
+            queued[u] = None
+            self.expanded += 1
+
+            new_key = self._key(u)
+            if key < new_key:
+                self._push(u, new_key)
+            elif g[u] > rhs[u]:
+                g[u] = rhs[u]
+                for offset, _ in neighbours:
+                    self._update_vertex(u + offset)
+            else:
+                g[u] = INF
+                self._update_vertex(u)
+                for offset, _ in neighbours:
+                    self._update_vertex(u + offset)
+        return rhs[start]
+
+    def update_cells(self, cells):
+        """
+        Tells the planner which cells of the maze changed.
+
+        Args:
+            cells: Iterable of (row, column) positions whose value in the
+                maze changed since the last call.
+
+        Returns:
+            The cost of the repaired path from the current start.
+        """
+        changed = []
+        for position in cells:
+            index = self.grid.index(position)
+            free = int(self.maze[position[0]][position[1]] == 0)
+            if self.free[index] != free:
+                self.free[index] = free
+                changed.append(index)
+        for index in changed:
+            self._update_vertex(index)
+            for offset, _ in self.grid.neighbours:
+                self._update_vertex(index + offset)
+        return self.compute_path()
+
+    def move_to(self, position):
+        """
+        Moves the start, for an agent that has advanced along the path.
+
+        Args:
+            position: The new start position.
+        """
+        new_start = self.grid.index(position)
+        self.km += self._heuristic(self._start, new_start)
+        self._start = new_start
+        self.start = tuple(position)
+
+    def path(self):
+        """
+        Returns the current shortest path from the start to the end.
+
+        Call compute_path() (or update_cells()) first. The path follows the
+        cheapest successor of each cell.
+
+        Returns:
+            The list of positions, empty if the end cannot be reached.
+        """
+        g, free = self.g, self.free
+        current = self._start
+        if self.rhs[current] == INF:
+            return []
+        path = [self.grid.position(current)]
+        while current != self._goal:
+            best, best_cost = -1, INF
+            for offset, cost in self.grid.neighbours:
+                s = current + offset
+                if free[s] and cost + g[s] < best_cost:
+                    best, best_cost = s, cost + g[s]
+            if best < 0:
+                return []
+            current = best
+            path.append(self.grid.position(current))
+            if len(path) > len(g):
+                return []  # g-values not repaired yet
+        return path
@@ -0,0 +1,187 @@
+"""
+Flow fields: one sweep from a shared goal serves every agent heading there.
+
+A reverse Dijkstra from the goal gives every cell its cost to the goal
+(moves cost the same both ways, so this is distance_map from the goal).
+The flow field then stores, per cell, the move towards the neighbour that
+continues a shortest path. An agent anywhere on the map reads its path
+off the field in O(path length), with no search at all.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from .batch import BatchResult
+from .grid import MOVES
+from .heuristics import UNREACHABLE, distance_map
+
+
+class FlowField:
+    """
+    Distance and direction fields towards one goal.
+
+    Attributes:
+        goal: The (row, column) goal position.
+        distances: uint32 (rows, columns) costs to the goal, UNREACHABLE
+            where the goal cannot be reached.
+        directions: int8 (rows, columns) index into grid.MOVES of the next
+            move towards the goal, -1 at the goal and where it cannot be
+            reached.
+    """
+    def __init__(self, maze, goal):
+        self.goal = (int(goal[0]), int(goal[1]))
+        self.distances = distance_map(maze, self.goal)
+        self.directions = self._directions(self.distances)
+        rows, cols = self.distances.shape
+        self.shape = (rows, cols)
+        self._steps = memoryview(self.directions.ravel())
+        self._offsets = [d_row * cols + d_col for (d_row, d_col), _ in MOVES]
+
+    @staticmethod
+    def _directions(distances):
+        """Picks the cheapest move out of every cell, for the whole grid at once."""
+        rows, cols = distances.shape
+        padded = np.full((rows + 2, cols + 2), np.iinfo(np.int64).max // 2)
+        padded[1:-1, 1:-1] = np.where(distances == UNREACHABLE, np.iinfo(np.int64).max // 2, distances)
+        best = np.full((rows, cols), np.iinfo(np.int64).max)
+        directions = np.full((rows, cols), -1, dtype=np.int8)
+        for k, ((d_row, d_col), cost) in enumerate(MOVES):
+            through = padded[1 + d_row:rows + 1 + d_row, 1 + d_col:cols + 1 + d_col] + cost
+            better = through < best
+            best[better] = through[better]
+            directions[better] = k
+        directions[(distances == 0) | (distances == UNREACHABLE)] = -1
+        return directions
+
+    def cost(self, position):
+        """Returns the cost from a position to the goal, inf if it cannot be reached."""
+        distance = self.distances[position[0], position[1]]
+        return float('inf') if distance == UNREACHABLE else int(distance)
+
+    def next_step(self, position):
+        """Returns the position to move to from a position, or None at the goal or off the field."""
+        k = self.directions[position[0], position[1]]
+        if k < 0:
+            return None
+        (d_row, d_col), _ = MOVES[k]
+        return position[0] + d_row, position[1] + d_col
+
+    def _walk(self, index):
+        steps, offsets = self._steps, self._offsets
+        indices = [index]
+        while steps[index] >= 0:
+            index += offsets[steps[index]]
+            indices.append(index)
+        return indices
+
+    def path(self, start):
+        """
+        Reads the shortest path from a position to the goal off the field.
+
+        Args:
+            start: The start position.
+
+        Returns:
+            The list of positions from the start to the goal and the cost,
+            or an empty list and inf if the goal cannot be reached.
+        """
+        cost = self.cost(start)
+        if cost == float('inf'):
+            return [], cost
+        cols = self.shape[1]
+        return [divmod(index, cols) for index in self._walk(start[0] * cols + start[1])], cost
+
+    def paths(self, starts):
+        """
+        Reads the paths of many agents off the field.
+
+        Args:
+            starts: Iterable of start positions, or an array of shape (n, 2).
+
+        Returns:
+            A BatchResult with the path and cost of every start, in order,
+            like plan_many.
+        """
+        cols = self.shape[1]
+        costs = []
+        offsets = [0]
+        indices = []
+        for start in starts:
+            cost = self.cost(start)
+            costs.append(cost)
+            if cost != float('inf'):
+                indices.extend(self._walk(int(start[0]) * cols + int(start[1])))
+            offsets.append(len(indices))
+        rows, cols = np.divmod(np.asarray(indices, dtype=np.int64), cols)
+        return BatchResult(np.asarray(costs, dtype=np.float64), np.asarray(offsets, dtype=np.int64),
+                           np.stack([rows, cols], axis=1).astype(np.int32))
+
+
+class FlowFieldCache:
+    """
+    Flow fields of one maze, built on demand and kept per goal.
+
+    The cache keeps a reference to the maze: after changing cells in place,
+    pass their positions to update_cells(), as with DStarLite. Fields the
+    changes cannot affect are kept.
+
+    Attributes:
+        maze: The grid the fields are built on.
+        max_fields: The number of goals to keep fields for; the least
+            recently used field is dropped first.
+        version: Counts the calls to update_cells that dropped fields.
+    """
+    def __init__(self, maze, max_fields=16):
+        self.maze = maze
+        self.max_fields = max_fields
+        self.version = 0
+        self._fields = OrderedDict()
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, goal):
+        """Returns the flow field towards a goal, building it if needed."""
+        goal = (int(goal[0]), int(goal[1]))
+        field = self._fields.get(goal)
+        if field is None:
+            field = self._fields[goal] = FlowField(self.maze, goal)
+            if len(self._fields) > self.max_fields:
+                self._fields.popitem(last=False)
+        else:
+            self._fields.move_to_end(goal)
+        return field
+
+    def update_cells(self, cells):
+        """
+        Tells the cache which cells of the maze changed.
+
+        A field is dropped if a changed cell or one of its neighbours can
+        reach the goal, since only then can a cost in the field change. A
+        field whose goal was blocked reaches no cell at all, so it is
+        dropped on any change, which covers the goal being reopened.
+
+        Args:
+            cells: Iterable of (row, column) positions whose value in the
+                maze changed.
+        """
+        cells = list(cells)
+        stale = []
+        for goal, field in self._fields.items():
+            if cells and field.distances[goal] == UNREACHABLE:
+                stale.append(goal)  # built with the goal blocked
+                continue
+            for row, col in cells:
+                around = field.distances[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2]
+                if (around != UNREACHABLE).any():
+                    stale.append(goal)
+                    break
+        for goal in stale:
+            del self._fields[goal]
+        if stale:
+            self.version += 1
+
+    def clear(self):
+        """Drops every field, for a maze that was replaced or changed wholesale."""
+        self._fields.clear()
+        self.version += 1
@@ -0,0 +1,58 @@
+"""
+Preprocessed maze shared by many path queries.
+"""
+import numpy as np
+
+# (row, column) move and its cost, in the same order as core.MOVES
+MOVES = [((0, -1), 10), ((0, 1), 10), ((-1, 0), 10), ((1, 0), 10),
+         ((-1, -1), 14), ((-1, 1), 14), ((1, -1), 14), ((1, 1), 14)]
+
+
+class Grid:
+    """
+    Maze padded with a one-cell wall border and flattened.
+
+    The border means a neighbour of any free cell is always a valid index,
+    so the query loops need no bounds checks, and moves become plain int
+    offsets into the flat arrays.
+
+    Attributes:
+        shape: The (rows, columns) shape of the original maze.
+        width: The number of columns of the padded grid.
+        blocked: Flat boolean obstacle bitmap of the padded grid.
+        free: The inverse of `blocked` as bytes, for fast scalar lookups.
+        neighbours: (flat offset, cost) pairs of the eight moves.
+    """
+    def __init__(self, maze):
+        maze = np.asarray(maze)
+        rows, cols = maze.shape
+        self.shape = (rows, cols)
+        self.width = cols + 2
+        blocked = np.ones((rows + 2, cols + 2), dtype=bool)
+        blocked[1:-1, 1:-1] = maze != 0
+        self.blocked = blocked.ravel()
+        self.free = (~self.blocked).astype(np.uint8).tobytes()
+        self.neighbours = [(dr * self.width + dc, cost) for (dr, dc), cost in MOVES]
+
+    @property
+    def size(self):
+        """The number of cells of the padded grid."""
+        return len(self.blocked)
+
+    def index(self, position):
+        """Returns the flat padded index of a (row, column) position."""
+        return (int(position[0]) + 1) * self.width + int(position[1]) + 1
+
+    def position(self, index):
+        """Returns the (row, column) position of a flat padded index."""
+        row, col = divmod(index, self.width)
+        return row - 1, col - 1
+
+    def positions(self, indices):
+        """Returns an int32 array of (row, column) positions of flat padded indices."""
+        rows, cols = np.divmod(np.asarray(indices, dtype=np.int64), self.width)
+        return np.stack([rows - 1, cols - 1], axis=1).astype(np.int32)
+
+    def in_bounds(self, position):
+        """Checks if a (row, column) position lies inside the maze."""
+        return 0 <= position[0] < self.shape[0] and 0 <= position[1] < self.shape[1]
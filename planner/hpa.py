@@ -0,0 +1,320 @@
+"""
+Hierarchical path-finding (HPA*) over the grid.
+
+The maze is cut into square clusters. Cells on either side of a cluster
+border where both are free form entrances; the entrance cells are the
+nodes of an abstract graph whose edges are the 10-cost steps across
+borders plus the shortest paths between the entrances of each cluster.
+A query searches the small abstract graph and then refines each abstract
+edge with the step-wise search inside one cluster. Paths are near-optimal
+rather than optimal; HPAResult reports how near.
+"""
+import time
+from heapq import heappop, heappush
+
+import numpy as np
+
+from .core import find_path
+from .heuristics import UNREACHABLE, distance_map, octile
+
+# runs of free border cells at least this long get an entrance at each end
+LONG_ENTRANCE = 6
+
+
+class HPAResult:
+    """
+    Path found by HPAStar.query with its cost and timings.
+
+    Attributes:
+        path: The list of positions from the start to the end.
+        cost: The cost of the path, inf if no path was found.
+        abstract_path: The entrance nodes the path runs through.
+        expanded: The number of abstract nodes expanded.
+        search_time: Seconds spent on the abstract search.
+        refine_time: Seconds spent refining the abstract path.
+        optimal_cost: The exact shortest path cost, if it was computed.
+        optimal_time: Seconds the exact search took, if it was run.
+    """
+    def __init__(self, path, cost, abstract_path, expanded, search_time, refine_time):
+        self.path = path
+        self.cost = cost
+        self.abstract_path = abstract_path
+        self.expanded = expanded
+        self.search_time = search_time
+        self.refine_time = refine_time
+        self.optimal_cost = None
+        self.optimal_time = None
+
+    @property
+    def time(self):
+        """Total seconds spent on the query."""
+        return self.search_time + self.refine_time
+
+    @property
+    def suboptimality(self):
+        """cost / optimal_cost, or None if the exact cost is unknown."""
+        if self.optimal_cost is None:
+            return None
+        if self.optimal_cost == self.cost:
+            return 1.0
+        return self.cost / self.optimal_cost
+
+    @property
+    def speedup(self):
+        """optimal_time / time, or None if the exact search was not run."""
+        if self.optimal_time is None:
+            return None
+        return self.optimal_time / max(self.time, 1e-9)
+
+
+class HPAStar:
+    """
+    Cluster abstraction of a maze, kept up to date as cells change.
+
+    Attributes:
+        maze: The planner's own copy of the grid.
+        cluster_size: The side length of the square clusters.
+        entrances: {(cluster, neighbour cluster): [(cell, cell), ...]} pairs
+            of entrance cells facing each other across each border.
+        intra: {cluster: {node: {node: cost}}} shortest paths between the
+            entrance nodes of each cluster, inside the cluster.
+        inter: {node: {node: cost}} steps across cluster borders.
+    """
+    def __init__(self, maze, cluster_size=16):
+        self.maze = np.array(maze, copy=True)
+        self.cluster_size = cluster_size
+        rows, cols = self.maze.shape
+        self.cluster_rows = -(-rows // cluster_size)
+        self.cluster_cols = -(-cols // cluster_size)
+        self.entrances = {}
+        self.intra = {}
+        self.inter = {}
+        for cluster in self.clusters():
+            for neighbour in self._forward_neighbours(cluster):
+                self._build_entrances(cluster, neighbour)
+        for cluster in self.clusters():
+            self._build_cluster(cluster)
+
+    def clusters(self):
+        """Yields the (cluster row, cluster column) of every cluster."""
+        for cluster_row in range(self.cluster_rows):
+            for cluster_col in range(self.cluster_cols):
+                yield cluster_row, cluster_col
+
+    def cluster_of(self, position):
+        return position[0] // self.cluster_size, position[1] // self.cluster_size
+
+    def bounds(self, cluster):
+        """Returns the (row0, row1, col0, col1) half-open bounds of a cluster."""
+        size = self.cluster_size
+        rows, cols = self.maze.shape
+        return (cluster[0] * size, min((cluster[0] + 1) * size, rows),
+                cluster[1] * size, min((cluster[1] + 1) * size, cols))
+
+    def nodes(self, cluster):
+        """Returns the entrance nodes that lie in a cluster."""
+        return self.intra.get(cluster, {}).keys()
+
+    def _forward_neighbours(self, cluster):
+        if cluster[0] + 1 < self.cluster_rows:
+            yield cluster[0] + 1, cluster[1]
+        if cluster[1] + 1 < self.cluster_cols:
+            yield cluster[0], cluster[1] + 1
+
+    def _border_keys(self, cluster):
+        cluster_row, cluster_col = cluster
+        for neighbour in ((cluster_row - 1, cluster_col), (cluster_row, cluster_col - 1)):
+            if neighbour[0] >= 0 and neighbour[1] >= 0:
+                yield neighbour, cluster
+        for neighbour in self._forward_neighbours(cluster):
+            yield cluster, neighbour
+
+    def _build_entrances(self, cluster, neighbour):
+        """Finds the entrances on the border between a cluster and the one below or right of it."""
+        for a, b in self.entrances.pop((cluster, neighbour), []):
+            self.inter[a].pop(b, None)
+            self.inter[b].pop(a, None)
+
+        row0, row1, col0, col1 = self.bounds(cluster)
+        if neighbour[0] != cluster[0]:  # neighbour below
+            line = [((row1 - 1, col), (row1, col)) for col in range(col0, col1)]
+        else:  # neighbour to the right
+            line = [((row, col1 - 1), (row, col1)) for row in range(row0, row1)]
+
+        pairs = []
+        run = []
+        for pair in line + [None]:  # the None sentinel closes the last run
+            if pair is not None and self.maze[pair[0]] == 0 and self.maze[pair[1]] == 0:
+                run.append(pair)
+                continue
+            if run:
+                if len(run) >= LONG_ENTRANCE:
+                    pairs.extend([run[0], run[-1]])
+                else:
+                    pairs.append(run[len(run) // 2])
+                run = []
+
+        self.entrances[(cluster, neighbour)] = pairs
+        for a, b in pairs:
+            self.inter.setdefault(a, {})[b] = 10
+            self.inter.setdefault(b, {})[a] = 10
+
+    def _build_cluster(self, cluster):
+        """Recomputes the entrance nodes of a cluster and the paths between them."""
+        row0, row1, col0, col1 = self.bounds(cluster)
+        nodes = set()
+        for key in self._border_keys(cluster):
+            for a, b in self.entrances.get(key, []):
+                nodes.add(a if self.cluster_of(a) == cluster else b)
+
+        area = self.maze[row0:row1, col0:col1]
+        edges = {}
+        for node in nodes:
+            distance = distance_map(area, (node[0] - row0, node[1] - col0))
+            edges[node] = {other: int(distance[other[0] - row0, other[1] - col0])
+                           for other in nodes
+                           if other != node and distance[other[0] - row0, other[1] - col0] != UNREACHABLE}
+        self.intra[cluster] = edges
+
+    def update(self, position, value):
+        """
+        Changes one cell of the maze and repairs the abstraction.
+
+        Only the cluster holding the cell is rebuilt, plus the cluster across
+        a border if the cell lies on it, since their shared entrances move.
+
+        Args:
+            position: The (row, column) of the cell.
+            value: The new value, 0 for free and anything else for an obstacle.
+
+        Returns:
+            The list of clusters that were rebuilt.
+        """
+        self.maze[position] = value
+        cluster = self.cluster_of(position)
+        row0, row1, col0, col1 = self.bounds(cluster)
+        rebuilt = [cluster]
+        for key in list(self._border_keys(cluster)):
+            other = key[0] if key[1] == cluster else key[1]
+            touches = (other[0] < cluster[0] and position[0] == row0) or \
+                (other[0] > cluster[0] and position[0] == row1 - 1) or \
+                (other[1] < cluster[1] and position[1] == col0) or \
+                (other[1] > cluster[1] and position[1] == col1 - 1)
+            if touches:
+                self._build_entrances(*key)
+                rebuilt.append(other)
+        for changed in rebuilt:
+            self._build_cluster(changed)
+        return rebuilt
+
+    def _links(self, position):
+        """Returns the costs from a cell to the entrance nodes of its cluster."""
+        cluster = self.cluster_of(position)
+        row0, row1, col0, col1 = self.bounds(cluster)
+        distance = distance_map(self.maze[row0:row1, col0:col1], (position[0] - row0, position[1] - col0))
+        return {node: int(distance[node[0] - row0, node[1] - col0])
+                for node in self.nodes(cluster) if distance[node[0] - row0, node[1] - col0] != UNREACHABLE}
+
+    def _local_path(self, a, b):
+        """Refines a step between two cells of the same cluster with the step-wise search."""
+        row0, row1, col0, col1 = self.bounds(self.cluster_of(a))
+        path, cost = find_path(self.maze[row0:row1, col0:col1], (a[0] - row0, a[1] - col0), (b[0] - row0, b[1] - col0))
+        return [(row + row0, col + col0) for row, col in path], cost
+
+    def query(self, start, end, exact=False, fallback=True):
+        """
+        Plans a path through the abstract graph and refines it.
+
+        Args:
+            start: The start position.
+            end: The end position.
+            exact: Also run the exact search, to fill in optimal_cost and
+                optimal_time of the result.
+            fallback: Run the exact search when the abstract graph has no
+                path. Entrances only pair cells straight across a border, so
+                a route that can only cross a border diagonally is invisible
+                to the abstraction.
+
+        Returns:
+            An HPAResult, with an empty path and cost inf if the end is
+            blocked.
+        """
+        started = time.perf_counter()
+        start, end = tuple(start), tuple(end)
+        if self.maze[end] != 0:
+            return HPAResult([], float('inf'), [], 0, time.perf_counter() - started, 0.0)
+        start_links = self._links(start)
+        end_links = self._links(end)
+
+        best_cost, best_nodes = float('inf'), None
+        direct = None
+        if self.cluster_of(start) == self.cluster_of(end):
+            direct = self._local_path(start, end)
+            best_cost = direct[1]
+
+        # A* over the entrance graph, with start and end hooked in
+        g = {start: 0}
+        parent = {start: None}
+        heap = [(octile(start, end), start)]
+        closed = set()
+        expanded = 0
+        while heap:
+            f, node = heappop(heap)
+            if node in closed:
+                continue
+            if f >= best_cost:
+                break
+            closed.add(node)
+            expanded += 1
+            if node == end:
+                best_cost, best_nodes = g[node], node
+                break
+
+            if node == start:
+                edges = dict(start_links)
+            else:
+                edges = dict(self.intra[self.cluster_of(node)].get(node, {}))
+            edges.update(self.inter.get(node, {}))
+            if node in end_links:
+                edges[end] = end_links[node]
+
+            for child, cost in edges.items():
+                child_g = g[node] + cost
+                if child not in closed and child_g < g.get(child, float('inf')):
+                    g[child] = child_g
+                    parent[child] = node
+                    heappush(heap, (child_g + octile(child, end), child))
+        search_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        abstract_path = []
+        if best_nodes is None:
+            path = direct[0] if direct is not None else []
+        else:
+            node = best_nodes
+            while node is not None:
+                abstract_path.append(node)
+                node = parent[node]
+            abstract_path.reverse()
+            path = [abstract_path[0]]
+            for a, b in zip(abstract_path, abstract_path[1:]):
+                if self.cluster_of(a) == self.cluster_of(b):
+                    local = self._local_path(a, b)[0]
+                    if not local:
+                        # the abstract edge came from the same cluster maze, so
+                        # this means the abstraction is out of date
+                        raise RuntimeError('no path inside cluster %s from %s to %s'
+                                           % (self.cluster_of(a), a, b))
+                    path.extend(local[1:])
+                else:
+                    path.append(b)  # one step across a border
+        refine_time = time.perf_counter() - started
+
+        result = HPAResult(path, best_cost, abstract_path, expanded, search_time, refine_time)
+        if exact or (not path and fallback):
+            started = time.perf_counter()
+            optimal_path, result.optimal_cost = find_path(self.maze, start, end)
+            result.optimal_time = time.perf_counter() - started
+            if not path and fallback:
+                result.path, result.cost = optimal_path, result.optimal_cost
+        return result
@@ -0,0 +1,143 @@
+"""
+Memory-bounded search with IDA* and a capped transposition table.
+
+astar and the batch planners allocate per-cell arrays for the whole map,
+which on a 10k x 10k map is gigabytes before the first expansion. IDA*
+only keeps the current depth-first path plus a transposition table of the
+best g seen for each cell, and the table stops growing at a fixed node
+cap. Past the cap the search stays correct, but it repeats more work,
+because cells it could not record are searched again. Deep paths take
+room from the table, since the stack frames count against the same cap.
+
+Iterations run depth-first up to a threshold on f = g + h, starting from
+h(start). Each new threshold is the smallest f that was cut off, so the
+first path found is optimal.
+"""
+import numpy as np
+
+from .grid import MOVES
+from .heuristics import octile
+
+INF = float('inf')
+
+
+class BoundedResult:
+    """
+    Path found by ida_star with its memory and work statistics.
+
+    Attributes:
+        path: The list of positions from the start to the end.
+        cost: The cost of the path, inf if no path was found.
+        iterations: The number of depth-first iterations run.
+        expanded: The number of cells expanded over all iterations.
+        peak_nodes: The most cells held at once, in the transposition
+            table plus the depth-first stack.
+        max_nodes: The node cap the search ran under.
+        complete: False if the stack hit the cap, so a longer path may
+            have been cut off; an empty path then does not prove the end
+            unreachable.
+    """
+    def __init__(self, path, cost, iterations, expanded, peak_nodes, max_nodes, complete):
+        self.path = path
+        self.cost = cost
+        self.iterations = iterations
+        self.expanded = expanded
+        self.peak_nodes = peak_nodes
+        self.max_nodes = max_nodes
+        self.complete = complete
+
+
+def ida_star(maze, start, end, max_nodes=1000000):
+    """
+    Finds the shortest path with IDA* using at most max_nodes stored cells.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        max_nodes: The cap on transposition table entries plus stack frames.
+
+    Returns:
+        A BoundedResult.
+    """
+    maze = np.asarray(maze)
+    rows, cols = maze.shape
+    start, end = tuple(start), tuple(end)
+    if maze[end] != 0:
+        return BoundedResult([], INF, 0, 0, 0, max_nodes, True)
+
+    def children(cell, g, threshold):
+        """Returns the (f, child, child g) in reach of the threshold, best first, and the lowest f cut off."""
+        result = []
+        cut = INF
+        row, col = cell
+        for (d_row, d_col), cost in MOVES:
+            child = (row + d_row, col + d_col)
+            if not (0 <= child[0] < rows and 0 <= child[1] < cols) or maze[child] != 0:
+                continue
+            child_g = g + cost
+            f = child_g + octile(child, end)
+            if f > threshold:
+                cut = min(cut, f)
+            else:
+                result.append((f, child, child_g))
+        result.sort()
+        return result, cut
+
+    if start == end:
+        return BoundedResult([start], 0, 0, 0, 1, max_nodes, True)
+
+    table = {}  # cell: (best g seen, iteration it was seen in)
+    threshold = octile(start, end)
+    iterations = expanded = peak = 0
+    complete = True
+    while threshold < INF:
+        iterations += 1
+        table[start] = (0, iterations)
+        first, next_threshold = children(start, 0, threshold)
+        stack = [[start, first, 0]]  # cell, children, next child to try
+        on_path = {start}
+        expanded += 1
+        while stack:
+            frame = stack[-1]
+            cell, options, i = frame
+            if i == len(options):
+                stack.pop()
+                on_path.discard(cell)
+                continue
+            frame[2] += 1
+            _, child, child_g = options[i]
+            if child in on_path:
+                continue
+            seen = table.get(child)
+            if seen is not None and (seen[0] < child_g or (seen[0] == child_g and seen[1] == iterations)):
+                continue  # reached more cheaply, or already searched from here this iteration
+            if seen is not None or len(table) + len(stack) + 1 < max_nodes:
+                table[child] = (child_g, iterations)  # leaving room for the child's frame
+
+            if child == end:
+                path = [entry[0] for entry in stack] + [child]
+                peak = max(peak, len(table) + len(stack))
+                return BoundedResult(path, child_g, iterations, expanded, peak, max_nodes, complete)
+
+            if len(table) + len(stack) >= max_nodes:
+                # the stack needs the room. The newest entries go first, as the
+                # ones near the start prune the most, but the child keeps its
+                # record; forgetting a cell only costs repeated work
+                record = table.pop(child, None)
+                while table and len(table) + len(stack) + (record is not None) >= max_nodes:
+                    table.popitem()
+                if record is not None and len(table) + len(stack) + 1 < max_nodes:
+                    table[child] = record
+            if len(stack) >= max_nodes:
+                complete = False
+                continue
+            options, cut = children(child, child_g, threshold)
+            next_threshold = min(next_threshold, cut)
+            stack.append([child, options, 0])
+            on_path.add(child)
+            expanded += 1
+            peak = max(peak, len(table) + len(stack))
+        threshold = next_threshold
+
+    return BoundedResult([], INF, iterations, expanded, peak, max_nodes, complete)
@@ -0,0 +1,342 @@
+"""
+JPS+: Jump Point Search with per-map precomputed jump distances.
+
+For every cell of the padded grid and each of the eight directions the
+table stores how far a jump in that direction goes:
+
+    d > 0   the next jump point is d steps away,
+    d <= 0  there is no jump point; the scan runs -d free steps into a wall.
+
+A zero means the neighbour in that direction is blocked, so the table also
+answers every free-cell test the search needs. The tables are built once
+per map, saved as a .npy file and memory-mapped back with
+np.load(mmap_mode='r'); queries then do no preprocessing at all.
+"""
+from heapq import heappop, heappush
+
+import numpy as np
+
+from .grid import MOVES
+from .heuristics import octile
+from .jump_point import _sign
+
+DIRECTIONS = [move for move, _ in MOVES]
+DIRECTION_INDEX = {direction: k for k, direction in enumerate(DIRECTIONS)}
+
+
+def _shift(a, d_row, d_col, fill):
+    """Returns b with b[r, c] = a[r + d_row, c + d_col], fill outside a."""
+    b = np.full_like(a, fill)
+    rows, cols = a.shape
+    b[max(0, -d_row):rows - max(0, d_row), max(0, -d_col):cols - max(0, d_col)] = \
+        a[max(0, d_row):rows - max(0, -d_row), max(0, d_col):cols - max(0, -d_col)]
+    return b
+
+
+def _forced(blocked, d_row, d_col):
+    """Marks the cells with a forced neighbour when entered along (d_row, d_col)."""
+    def free(dr, dc):
+        return ~_shift(blocked, dr, dc, True)
+
+    def wall(dr, dc):
+        return _shift(blocked, dr, dc, True)
+
+    if d_row != 0 and d_col != 0:
+        return (free(d_row, -d_col) & wall(0, -d_col)) | (free(-d_row, d_col) & wall(-d_row, 0))
+    if d_row == 0:
+        return (free(1, d_col) & wall(1, 0)) | (free(-1, d_col) & wall(-1, 0))
+    return (free(d_row, 1) & wall(0, 1)) | (free(d_row, -1) & wall(0, -1))
+
+
+def _sweep(blocked, jump_cells, d_row, d_col):
+    """Fills the jump distances of one direction, one row (or column) at a time."""
+    if d_row == 0:
+        return _sweep(blocked.T, jump_cells.T, d_col, 0).T
+
+    rows = blocked.shape[0]
+    table = np.zeros(blocked.shape, dtype=np.int32)
+    order = range(rows - 2, -1, -1) if d_row > 0 else range(1, rows)
+    for row in order:
+        neighbour = row + d_row
+        next_blocked = _shift(blocked[neighbour][None], 0, d_col, True)[0]
+        next_jump = _shift(jump_cells[neighbour][None], 0, d_col, False)[0]
+        next_distance = _shift(table[neighbour][None], 0, d_col, 0)[0]
+        distance = np.where(next_distance > 0, next_distance + 1, next_distance - 1)
+        distance[next_jump] = 1
+        distance[next_blocked] = 0
+        table[row] = distance
+    return table
+
+
+def build_jump_table(maze):
+    """
+    Computes the JPS+ jump distances of a maze.
+
+    Args:
+        maze: The grid.
+
+    Returns:
+        An int32 array of shape (8, rows + 2, cols + 2): one layer per
+        direction in DIRECTIONS order, over the maze padded with a wall
+        border like Grid.
+    """
+    maze = np.asarray(maze)
+    blocked = np.ones((maze.shape[0] + 2, maze.shape[1] + 2), dtype=bool)
+    blocked[1:-1, 1:-1] = maze != 0
+
+    distances = np.zeros((len(DIRECTIONS),) + blocked.shape, dtype=np.int32)
+    # straight runs first; a diagonal run stops wherever one of them would
+    for k, (d_row, d_col) in enumerate(DIRECTIONS):
+        if d_row == 0 or d_col == 0:
+            distances[k] = _sweep(blocked, _forced(blocked, d_row, d_col), d_row, d_col)
+    for k, (d_row, d_col) in enumerate(DIRECTIONS):
+        if d_row != 0 and d_col != 0:
+            jump_cells = _forced(blocked, d_row, d_col) \
+                | (distances[DIRECTION_INDEX[(d_row, 0)]] > 0) \
+                | (distances[DIRECTION_INDEX[(0, d_col)]] > 0)
+            distances[k] = _sweep(blocked, jump_cells, d_row, d_col)
+    return distances
+
+
+def save_jump_table(maze, path):
+    """Builds the jump table of a maze and saves it to a .npy file."""
+    np.save(path, build_jump_table(maze))
+
+
+class JumpTable:
+    """
+    Precomputed JPS+ jump distances of one map.
+
+    Attributes:
+        distances: The (8, rows + 2, cols + 2) table, possibly memory-mapped.
+        shape: The (rows, columns) shape of the original maze.
+        width: The number of columns of the padded grid.
+    """
+    def __init__(self, distances):
+        self.distances = distances
+        self.shape = (distances.shape[1] - 2, distances.shape[2] - 2)
+        self.width = distances.shape[2]
+        # memoryviews index straight to Python ints, which is much cheaper
+        # than numpy (or memmap) scalar access in the search loop
+        flat = np.asarray(distances).reshape(len(DIRECTIONS), -1)
+        self._layers = [memoryview(layer) for layer in flat]
+
+    @classmethod
+    def build(cls, maze):
+        """Builds the table of a maze in memory."""
+        return cls(build_jump_table(maze))
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps a table saved by save_jump_table or save()."""
+        return cls(np.load(path, mmap_mode='r'))
+
+    def save(self, path):
+        np.save(path, self.distances)
+
+    @property
+    def size(self):
+        """The number of cells of the padded grid."""
+        return len(self._layers[0])
+
+    def index(self, position):
+        """Returns the flat padded index of a (row, column) position."""
+        return (int(position[0]) + 1) * self.width + int(position[1]) + 1
+
+    def position(self, index):
+        """Returns the (row, column) position of a flat padded index."""
+        row, col = divmod(index, self.width)
+        return row - 1, col - 1
+
+    def positions(self, indices):
+        """Returns an int32 array of (row, column) positions of flat padded indices."""
+        rows, cols = np.divmod(np.asarray(indices, dtype=np.int64), self.width)
+        return np.stack([rows - 1, cols - 1], axis=1).astype(np.int32)
+
+    def is_free(self, index):
+        """Checks if the cell at a padded index is free."""
+        # the cell is the west neighbour of the cell to its east
+        return self._layers[DIRECTION_INDEX[(0, -1)]][index + 1] != 0
+
+    def neighbour_free(self, index, d_row, d_col):
+        """Checks if the neighbour of a cell in a direction is free."""
+        return self._layers[DIRECTION_INDEX[(d_row, d_col)]][index] != 0
+
+    def _reach(self, index, d_row, d_col, steps):
+        """Checks if a straight run of steps cells from index is free."""
+        return abs(self._layers[DIRECTION_INDEX[(d_row, d_col)]][index]) >= steps
+
+    def jump(self, index, d_row, d_col, target):
+        """
+        Looks up the next jump point from a cell in one direction.
+
+        Args:
+            index: The padded index to jump from.
+            d_row: The row direction, -1, 0 or 1.
+            d_col: The column direction, -1, 0 or 1.
+            target: The padded index of the end cell.
+
+        Returns:
+            The padded index of the jump point, or -1. The end cell counts
+            as a jump point, as does a diagonal cell with a clear straight
+            run to it.
+        """
+        width = self.width
+        distance = self._layers[DIRECTION_INDEX[(d_row, d_col)]][index]
+        limit = abs(distance)
+        best = distance if distance > 0 else limit + 1
+        row, col = divmod(index, width)
+        target_row, target_col = divmod(target, width)
+        ahead_rows = (target_row - row) * d_row
+        ahead_cols = (target_col - col) * d_col
+
+        if d_row == 0 or d_col == 0:
+            ahead = ahead_rows if d_row != 0 else ahead_cols
+            across = target_col - col if d_row != 0 else target_row - row
+            if across == 0 and 0 < ahead <= limit:
+                best = min(best, ahead)
+        else:
+            # diagonal steps after which the end is straight ahead
+            for steps, d_straight, remaining in ((ahead_rows, (0, d_col), ahead_cols - ahead_rows),
+                                                 (ahead_cols, (d_row, 0), ahead_rows - ahead_cols)):
+                if 0 < steps <= limit and steps < best and remaining >= 0:
+                    corner = index + steps * (d_row * width + d_col)
+                    if remaining == 0 or self._reach(corner, d_straight[0], d_straight[1], remaining):
+                        best = steps
+
+        if best > limit:
+            return -1
+        return index + best * (d_row * width + d_col)
+
+    def directions(self, index, d_row, d_col):
+        """Returns the pruned directions to search from a cell, as jump_point.directions."""
+        if d_row == 0 and d_col == 0:
+            return DIRECTIONS
+        free = self.neighbour_free
+        result = []
+        if d_row != 0 and d_col != 0:
+            if free(index, d_row, 0):
+                result.append((d_row, 0))
+            if free(index, 0, d_col):
+                result.append((0, d_col))
+            if free(index, d_row, d_col):
+                result.append((d_row, d_col))
+            if not free(index, 0, -d_col):
+                result.append((d_row, -d_col))
+            if not free(index, -d_row, 0):
+                result.append((-d_row, d_col))
+        elif d_row != 0:
+            if free(index, d_row, 0):
+                result.append((d_row, 0))
+            if not free(index, 0, 1):
+                result.append((d_row, 1))
+            if not free(index, 0, -1):
+                result.append((d_row, -1))
+        else:
+            if free(index, 0, d_col):
+                result.append((0, d_col))
+            if not free(index, 1, 0):
+                result.append((1, d_col))
+            if not free(index, -1, 0):
+                result.append((-1, d_col))
+        return result
+
+
+class JumpPlanner:
+    """
+    JPS+ queries over a JumpTable with scratch buffers reused between queries.
+
+    The buffers work like QueryPlanner's: a per-query stamp marks which
+    entries are valid, so nothing is cleared between queries.
+
+    Attributes:
+        table: The jump table of the map.
+        expanded: The number of jump points expanded by the last query.
+    """
+    def __init__(self, table):
+        if not isinstance(table, JumpTable):
+            table = JumpTable(table)
+        self.table = table
+        size = table.size
+        self.g = [0] * size
+        self.parent = [-1] * size
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.stamp = 0
+        self.expanded = 0
+
+    def query(self, start, end):
+        """
+        Finds the shortest path between two positions.
+
+        Args:
+            start: The start position.
+            end: The end position.
+
+        Returns:
+            The list of flat padded indices of every cell from start to end
+            and the path cost, or an empty list and inf if the end cannot be
+            reached.
+        """
+        table = self.table
+        width = table.width
+        g, parent, seen, closed = self.g, self.parent, self.seen, self.closed
+        self.stamp += 1
+        stamp = self.stamp
+        source, target = table.index(start), table.index(end)
+        if not table.is_free(target):
+            self.expanded = 0
+            return [], float('inf')
+        target_position = divmod(target, width)
+
+        seen[source] = stamp
+        g[source] = 0
+        parent[source] = -1
+        heap = [(0, source)]
+        expanded = 0
+        while heap:
+            _, current = heappop(heap)
+            if closed[current] == stamp:
+                continue  # stale entry superseded by a cheaper push
+            closed[current] = stamp
+            expanded += 1
+
+            if current == target:
+                self.expanded = expanded
+                return self._unpack(current), g[target]
+
+            row, col = divmod(current, width)
+            d_row = d_col = 0
+            if parent[current] >= 0:
+                parent_row, parent_col = divmod(parent[current], width)
+                d_row, d_col = _sign(row - parent_row), _sign(col - parent_col)
+
+            current_g = g[current]
+            for direction in table.directions(current, d_row, d_col):
+                child = table.jump(current, direction[0], direction[1], target)
+                if child < 0 or closed[child] == stamp:
+                    continue
+                child_row, child_col = divmod(child, width)
+                rows, cols = abs(child_row - row), abs(child_col - col)
+                child_g = current_g + 14 * min(rows, cols) + 10 * (max(rows, cols) - min(rows, cols))
+                if seen[child] == stamp and child_g >= g[child]:
+                    continue
+                seen[child] = stamp
+                g[child] = child_g
+                parent[child] = current
+                heappush(heap, (child_g + octile((child_row, child_col), target_position), child))
+
+        self.expanded = expanded
+        return [], float('inf')
+
+    def _unpack(self, index):
+        """Returns every padded index from the start to index along the jump points."""
+        width = self.table.width
+        path = [index]
+        while self.parent[index] >= 0:
+            previous = self.parent[index]
+            step = _sign(previous // width - index // width) * width + _sign(previous % width - index % width)
+            while index != previous:
+                index += step
+                path.append(index)
+        return path[::-1]
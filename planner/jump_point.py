@@ -0,0 +1,242 @@
+"""
+Jump Point Search over the same 8-connected, 10/14 cost grid as astar.
+
+Diagonal moves are allowed past obstacle corners, as in generate_children,
+so the pruning and forced-neighbour rules are the ones for grids where
+diagonal moves are always allowed.
+"""
+import numpy as np
+
+from .core import CLOSED, ClosedList, OpenList, SearchState, relax
+from .grid import Grid
+
+
+class JumpState(SearchState):
+    """
+    SearchState that also keeps the padded Grid the jumps scan over.
+
+    Attributes:
+        grid: The preprocessed maze.
+    """
+    def __init__(self, maze):
+        super().__init__(np.shape(maze))
+        self.grid = Grid(maze)
+
+
+def _sign(value):
+    return (value > 0) - (value < 0)
+
+
+def directions(free, width, index, d_row, d_col):
+    """
+    Returns the pruned set of directions to search from a cell.
+
+    Args:
+        free: The free-cell bytes of the padded grid.
+        width: The width of the padded grid.
+        index: The padded index of the cell.
+        d_row: The row direction the cell was reached in, or 0.
+        d_col: The column direction the cell was reached in, or 0.
+
+    Returns:
+        A list of (d_row, d_col) directions: the natural neighbours plus any
+        forced ones. All eight directions for the start cell.
+    """
+    if d_row == 0 and d_col == 0:
+        return [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+    result = []
+    if d_row != 0 and d_col != 0:
+        if free[index + d_row * width]:
+            result.append((d_row, 0))
+        if free[index + d_col]:
+            result.append((0, d_col))
+        if free[index + d_row * width + d_col]:
+            result.append((d_row, d_col))
+        if not free[index - d_col]:
+            result.append((d_row, -d_col))
+        if not free[index - d_row * width]:
+            result.append((-d_row, d_col))
+    elif d_row != 0:
+        if free[index + d_row * width]:
+            result.append((d_row, 0))
+        if not free[index + 1]:
+            result.append((d_row, 1))
+        if not free[index - 1]:
+            result.append((d_row, -1))
+    else:
+        if free[index + d_col]:
+            result.append((0, d_col))
+        if not free[index + width]:
+            result.append((1, d_col))
+        if not free[index - width]:
+            result.append((-1, d_col))
+    return result
+
+
+def _jump_straight(free, width, index, d_row, d_col, target):
+    step = d_row * width + d_col
+    while True:
+        index += step
+        if not free[index]:
+            return -1
+        if index == target:
+            return index
+        if d_row == 0:
+            if (free[index + d_col + width] and not free[index + width]) or \
+                    (free[index + d_col - width] and not free[index - width]):
+                return index
+        else:
+            if (free[index + d_row * width + 1] and not free[index + 1]) or \
+                    (free[index + d_row * width - 1] and not free[index - 1]):
+                return index
+
+
+def jump(free, width, index, d_row, d_col, target):
+    """
+    Scans from a cell in one direction for the next jump point.
+
+    Args:
+        free: The free-cell bytes of the padded grid.
+        width: The width of the padded grid.
+        index: The padded index to scan from (not itself tested).
+        d_row: The row direction, -1, 0 or 1.
+        d_col: The column direction, -1, 0 or 1.
+        target: The padded index of the end cell.
+
+    Returns:
+        The padded index of the jump point, or -1 if the scan runs into an
+        obstacle first.
+    """
+    if d_row == 0 or d_col == 0:
+        return _jump_straight(free, width, index, d_row, d_col, target)
+
+    step = d_row * width + d_col
+    while True:
+        index += step
+        if not free[index]:
+            return -1
+        if index == target:
+            return index
+        if (free[index - d_col + d_row * width] and not free[index - d_col]) or \
+                (free[index + d_col - d_row * width] and not free[index - d_row * width]):
+            return index
+        if _jump_straight(free, width, index, 0, d_col, target) >= 0 or \
+                _jump_straight(free, width, index, d_row, 0, target) >= 0:
+            return index
+
+
+def _run_free(maze, row, col, d_row, d_col, end_row, end_col):
+    """Checks the live maze along a straight or diagonal run, past its first cell up to its last."""
+    while (row, col) != (end_row, end_col):
+        row, col = row + d_row, col + d_col
+        if maze[row][col] != 0:
+            return False
+    return True
+
+
+def expand_path(jump_points):
+    """
+    Fills in the cells between consecutive jump points.
+
+    Args:
+        jump_points: List of positions, each reachable from the previous one
+            by a straight or diagonal run.
+
+    Returns:
+        The list of every cell position along the path.
+    """
+    if not jump_points:
+        return []
+    path = [jump_points[0]]
+    for (row, col), (next_row, next_col) in zip(jump_points, jump_points[1:]):
+        d_row, d_col = _sign(next_row - row), _sign(next_col - col)
+        while (row, col) != (next_row, next_col):
+            row, col = row + d_row, col + d_col
+            path.append((row, col))
+    return path
+
+
+def _begin(maze, start):
+    """Returns the state and lists of a new search on the current maze."""
+    state = JumpState(maze)
+    open_list = OpenList(state)
+    closed_list = ClosedList(state)
+    open_list.push(state.index(start))
+    return state, open_list, closed_list
+
+
+def jps(maze, start, end, open_list=None, closed_list=None):
+    """
+    Runs one step of Jump Point Search.
+
+    A drop-in replacement for astar: it takes and returns the same values,
+    but the open and closed lists only ever hold jump points, and each step
+    expands one jump point.
+
+    The jumps scan a copy of the maze taken when the search starts. To see
+    walls added while it runs, the run to each jump point is checked
+    against the maze when the point is popped. If the run is blocked, the
+    step returns fresh lists that start the search over on the current
+    maze.
+
+    Args:
+        maze: The grid.
+        start: The start position.
+        end: The end position.
+        open_list: The jump points to be evaluated.
+        closed_list: The jump points that have been evaluated.
+
+    Returns:
+        The shortest path from the start to the end (every cell, not only
+        the jump points), the cost of the path, the end node, and the open
+        and closed lists. The end node's parent chain runs through the jump
+        points.
+    """
+    if open_list is None or len(open_list) == 0:  # start a new search
+        state, open_list, closed_list = _begin(maze, start)
+    else:
+        state = open_list.state  # continue from last moved state
+        if closed_list is None:
+            closed_list = ClosedList(state)
+
+    grid = state.grid
+    free, width = grid.free, grid.width
+    g, parent, flags = state.g, state.parent, state.flags
+    end_index = state.index(end)
+    target = grid.index(end)
+
+    if len(open_list) > 0:
+        current = open_list.pop()
+        row, col = state.position(current)
+        d_row = d_col = 0
+        if parent[current] >= 0:
+            parent_row, parent_col = state.position(parent[current])
+            d_row, d_col = _sign(row - parent_row), _sign(col - parent_col)
+            if not _run_free(maze, parent_row, parent_col, d_row, d_col, row, col):
+                # a wall was added on the run since it was scanned. The scans
+                # of every closed jump point may be out of date too, so the
+                # search starts over on a grid of the current maze
+                _, open_list, closed_list = _begin(maze, start)
+                return [], float('inf'), None, open_list, closed_list
+        closed_list.append(current)
+
+        if current == end_index:
+            return expand_path(state.path(current)), int(g[current]), state.node(current), open_list, closed_list
+
+        here = grid.index((row, col))
+        for direction in directions(free, width, here, d_row, d_col):
+            jump_point = jump(free, width, here, direction[0], direction[1], target)
+            if jump_point < 0:
+                continue
+
+            jump_row, jump_col = grid.position(jump_point)
+            child = state.index((jump_row, jump_col))
+            if flags[child] == CLOSED:
+                continue
+
+            rows, cols = abs(jump_row - row), abs(jump_col - col)
+            cost = 14 * min(rows, cols) + 10 * (max(rows, cols) - min(rows, cols))
+            relax(state, open_list, current, child, g[current] + cost, end)
+
+    return [], float('inf'), None, open_list, closed_list
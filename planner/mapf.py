@@ -0,0 +1,356 @@
+"""
+Multi-agent path finding with Conflict-Based Search (CBS) and ECBS.
+
+Every agent moves on the same 8-connected grid one move per time step, or
+waits in place. Moves cost 10/14 as in the single-agent search, a wait
+costs 10, and an agent stays on its goal for good once it arrives. The
+cost of a plan is the sum of the agents' path costs.
+
+The high level searches a tree of constraint sets. Each node plans every
+agent on its own and finds the first conflict between two of them. A
+conflict is both agents in one cell at one time (vertex), or the two
+swapping cells in one step (edge). The node then branches into two
+children, each forbidding the conflict to one of the agents. The low level
+is a space-time A* over (cell, time) that obeys an agent's constraints.
+
+With a suboptimality w > 1 (ECBS) both levels run focal searches. A node
+is only chosen among those within w of the lowest bound. Among those, the
+one with the fewest conflicts against the other agents is taken. The plan
+then costs at most w times the optimum, and far fewer nodes are searched.
+"""
+import time
+from heapq import heappop, heappush
+
+import numpy as np
+
+from .grid import Grid
+from .heuristics import UNREACHABLE, distance_map
+
+WAIT_COST = 10
+
+
+class MAPFResult:
+    """
+    Plan found by cbs or ecbs.
+
+    Attributes:
+        paths: One list of (row, column) positions per agent, the position
+            at each time step up to its arrival; None if no plan was found.
+        costs: The cost of each agent's path.
+        cost: The sum of the path costs, inf if no plan was found.
+        lower_bound: A lower bound on the optimal sum of costs.
+        expanded: The number of high-level nodes expanded.
+        elapsed: Seconds spent.
+        solved: False if the search ran out of nodes or time, or no plan
+            exists.
+    """
+    def __init__(self, paths, costs, cost, lower_bound, expanded, elapsed, solved):
+        self.paths = paths
+        self.costs = costs
+        self.cost = cost
+        self.lower_bound = lower_bound
+        self.expanded = expanded
+        self.elapsed = elapsed
+        self.solved = solved
+
+    @property
+    def suboptimality(self):
+        """cost / lower_bound, the proven bound on how far from optimal the plan is."""
+        if not self.solved or self.lower_bound <= 0:
+            return 1.0 if self.solved else None
+        return self.cost / self.lower_bound
+
+
+class _Occupancy:
+    """Where the agents of a plan are over time, for counting conflicts with it."""
+    def __init__(self, paths, skip):
+        self.vertex = {}  # (cell, t): number of agents there
+        self.edge = {}  # (cell, next cell, t): number of agents making that move
+        self.resting = {}  # goal cell: times from which an agent stays there
+        for agent, path in enumerate(paths):
+            if agent == skip or path is None:
+                continue
+            for t, cell in enumerate(path):
+                self.vertex[(cell, t)] = self.vertex.get((cell, t), 0) + 1
+                if t + 1 < len(path) and path[t + 1] != cell:
+                    key = (cell, path[t + 1], t)
+                    self.edge[key] = self.edge.get(key, 0) + 1
+            self.resting.setdefault(path[-1], []).append(len(path))
+
+    def conflicts(self, cell, next_cell, t):
+        """Counts the conflicts of a move from cell at time t to next_cell at t + 1."""
+        count = self.vertex.get((next_cell, t + 1), 0) + self.edge.get((next_cell, cell, t), 0)
+        for since in self.resting.get(next_cell, ()):
+            if t + 1 >= since:
+                count += 1
+        return count
+
+
+def _refill(open_heap, pending, focal, done, bound, weight, conflicts):
+    """
+    Widens the focal bound to weight times the lowest key still queued.
+
+    Expanded entries are dropped from the top of the open heap first, and
+    the pending entries the new bound covers move into focal. If focal is
+    empty, the cheapest pending entry is moved anyway.
+
+    Returns:
+        The lowest queued key (None if nothing is queued) and the new bound.
+    """
+    while open_heap and done[open_heap[0][1]]:
+        heappop(open_heap)
+    if not open_heap:
+        return None, bound
+    lowest = open_heap[0][0]
+    bound = max(bound, weight * lowest)
+    while pending and (pending[0][0] <= bound or not focal):
+        key, index = heappop(pending)
+        if not done[index]:
+            heappush(focal, (conflicts(index), key, index))
+    return lowest, bound
+
+
+def _plan_agent(grid, start, goal, h, vertex, edge, occupancy, weight, horizon):
+    """
+    Plans one agent through space and time around its constraints.
+
+    A focal search: nodes within weight of the lowest f are expanded fewest
+    conflicts first. With weight 1 it is plain A* with conflicts breaking
+    ties.
+
+    Args:
+        grid: The padded Grid.
+        start: The padded index of the start.
+        goal: The padded index of the goal.
+        h: Padded list of exact costs to the goal, ignoring other agents.
+        vertex: Set of (cell, t) the agent may not be in.
+        edge: Set of (cell, next cell, t) moves the agent may not make.
+        occupancy: _Occupancy of the other agents.
+        weight: The suboptimality bound of the focal search.
+        horizon: The last time step to search up to.
+
+    Returns:
+        The list of padded indices per time step, the path cost and a lower
+        bound on the cheapest path, or None if there is no path.
+    """
+    if h[start] == UNREACHABLE or (start, 0) in vertex:
+        return None
+    last_goal = max((t for cell, t in vertex if cell == goal), default=-1)
+    free, neighbours = grid.free, grid.neighbours
+
+    cells, times, costs, conflicts, parents = [start], [0], [0], [0], [-1]
+    best = {(start, 0): 0}
+    done = [False]
+    open_heap = [(h[start], 0)]  # (f, node) of every queued node
+    pending = []  # (f, node) of queued nodes outside the focal bound
+    focal = [(0, h[start], 0)]  # (conflicts, f, node) within the bound
+    bound = weight * h[start]
+    while True:
+        lowest, bound = _refill(open_heap, pending, focal, done, bound, weight, conflicts.__getitem__)
+        if lowest is None:
+            return None
+        _, _, node = heappop(focal)
+        if done[node]:
+            continue
+        done[node] = True
+        cell, t, g = cells[node], times[node], costs[node]
+        if cell == goal and t > last_goal:
+            path = []
+            while node >= 0:
+                path.append(cells[node])
+                node = parents[node]
+            return path[::-1], g, min(lowest, g)
+        if t >= horizon:
+            continue
+
+        for offset, cost in [(0, WAIT_COST)] + neighbours:
+            child_cell = cell + offset
+            if not free[child_cell] or h[child_cell] == UNREACHABLE:
+                continue
+            if (child_cell, t + 1) in vertex or (cell, child_cell, t) in edge:
+                continue
+            child_g = g + cost
+            if child_g >= best.get((child_cell, t + 1), float('inf')):
+                continue
+            best[(child_cell, t + 1)] = child_g
+            child = len(cells)
+            cells.append(child_cell)
+            times.append(t + 1)
+            costs.append(child_g)
+            conflicts.append(conflicts[node] + occupancy.conflicts(cell, child_cell, t))
+            parents.append(node)
+            done.append(False)
+            f = child_g + h[child_cell]
+            heappush(open_heap, (f, child))
+            if f <= bound:
+                heappush(focal, (conflicts[child], f, child))
+            else:
+                heappush(pending, (f, child))
+
+
+def _find_conflicts(paths):
+    """
+    Finds the conflicts between the agents' paths.
+
+    Returns:
+        The number of conflicting pairs, and the earliest conflict as
+        ('vertex', a, b, cell, t) or ('edge', a, b, cell, next cell, t),
+        or None.
+    """
+    length = max(len(path) for path in paths)
+    count, first = 0, None
+    for t in range(length):
+        at = {}
+        moves = {}
+        for agent, path in enumerate(paths):
+            cell = path[min(t, len(path) - 1)]
+            if cell in at:
+                count += 1
+                first = first or ('vertex', at[cell], agent, cell, t)
+            else:
+                at[cell] = agent
+            if t + 1 < len(path) and path[t + 1] != cell:
+                following = path[t + 1]
+                if (following, cell) in moves:
+                    count += 1
+                    first = first or ('edge', moves[(following, cell)], agent, following, cell, t)
+                moves[(cell, following)] = agent
+    return count, first
+
+
+class _Node:
+    """High-level node: per-agent constraints and the paths that obey them."""
+    __slots__ = ('vertex', 'edge', 'paths', 'costs', 'lowers', 'cost', 'lower', 'conflicts', 'first')
+
+    def __init__(self, vertex, edge, paths, costs, lowers):
+        self.vertex = vertex
+        self.edge = edge
+        self.paths = paths
+        self.costs = costs
+        self.lowers = lowers
+        self.cost = sum(costs)
+        self.lower = sum(lowers)
+        self.conflicts, self.first = _find_conflicts(paths)
+
+
+def _search(maze, starts, goals, weight, max_nodes, time_limit):
+    started = time.perf_counter()
+    grid = Grid(maze)
+    rows, cols = grid.shape
+    starts = [grid.index(start) for start in starts]
+    goals = [grid.index(goal) for goal in goals]
+    heuristics = {}
+    for goal in set(goals):
+        padded = np.full((rows + 2, cols + 2), UNREACHABLE, dtype=np.uint32)
+        padded[1:-1, 1:-1] = distance_map(grid, grid.position(goal))
+        heuristics[goal] = padded.ravel().tolist()
+    free_cells = int((~grid.blocked).sum())
+
+    def plan(agent, vertex, edge, paths):
+        latest = max([t for _, t in vertex] + [t for _, _, t in edge] + [0])
+        return _plan_agent(grid, starts[agent], goals[agent], heuristics[goals[agent]], vertex, edge,
+                           _Occupancy(paths, agent), weight, latest + free_cells)
+
+    def result(node, lower, expanded):
+        elapsed = time.perf_counter() - started
+        if node is None:
+            return MAPFResult(None, None, float('inf'), lower, expanded, elapsed, False)
+        paths = [[grid.position(cell) for cell in path] for path in node.paths]
+        return MAPFResult(paths, list(node.costs), node.cost, lower, expanded, elapsed, True)
+
+    empty = [frozenset()] * len(starts)
+    paths, costs, lowers = [None] * len(starts), [0] * len(starts), [0] * len(starts)
+    for agent in range(len(starts)):
+        planned = plan(agent, empty[agent], empty[agent], paths)
+        if planned is None:
+            return result(None, float('inf'), 0)
+        paths[agent], costs[agent], lowers[agent] = planned
+    root = _Node(empty, empty, paths, costs, lowers)
+
+    # the same three heaps as the low level, over constraint tree nodes
+    nodes = [root]
+    done = [False]
+    open_heap = [(root.lower, 0)]
+    pending = []
+    focal = [(root.conflicts, root.cost, 0)]
+    bound = weight * root.lower
+    expanded = 0
+    while True:
+        lower, bound = _refill(open_heap, pending, focal, done, bound, weight,
+                               lambda index: nodes[index].conflicts)
+        if lower is None:
+            break
+        _, _, index = heappop(focal)
+        if done[index]:
+            continue
+        done[index] = True
+        node = nodes[index]
+        if node.first is None:
+            return result(node, min(lower, node.cost), expanded)
+        expanded += 1
+        if expanded > max_nodes or (time_limit is not None and time.perf_counter() - started > time_limit):
+            return result(None, lower, expanded)
+
+        kind, a, b = node.first[:3]
+        if kind == 'vertex':
+            cell, t = node.first[3:]
+            branches = [(a, (cell, t), None), (b, (cell, t), None)]
+        else:
+            cell, following, t = node.first[3:]
+            branches = [(a, None, (cell, following, t)), (b, None, (following, cell, t))]
+        for agent, vertex, edge in branches:
+            child_vertex, child_edge = list(node.vertex), list(node.edge)
+            if vertex is not None:
+                child_vertex[agent] = node.vertex[agent] | {vertex}
+            else:
+                child_edge[agent] = node.edge[agent] | {edge}
+            planned = plan(agent, child_vertex[agent], child_edge[agent], node.paths)
+            if planned is None:
+                continue
+            paths, costs, lowers = list(node.paths), list(node.costs), list(node.lowers)
+            paths[agent], costs[agent], lowers[agent] = planned
+            child = _Node(child_vertex, child_edge, paths, costs, lowers)
+            nodes.append(child)
+            done.append(False)
+            heappush(open_heap, (child.lower, len(nodes) - 1))
+            if child.cost <= bound:
+                heappush(focal, (child.conflicts, child.cost, len(nodes) - 1))
+            else:
+                heappush(pending, (child.cost, len(nodes) - 1))
+    return result(None, float('inf'), expanded)
+
+
+def cbs(maze, starts, goals, max_nodes=10000, time_limit=None):
+    """
+    Plans collision-free paths for several agents with minimal total cost.
+
+    Args:
+        maze: The grid.
+        starts: The start position of each agent.
+        goals: The goal position of each agent.
+        max_nodes: The most high-level nodes to expand before giving up.
+        time_limit: Seconds to run before giving up, or None.
+
+    Returns:
+        A MAPFResult.
+    """
+    return _search(maze, starts, goals, 1.0, max_nodes, time_limit)
+
+
+def ecbs(maze, starts, goals, suboptimality=1.5, max_nodes=10000, time_limit=None):
+    """
+    Plans collision-free paths with a total cost within a factor of optimal.
+
+    Args:
+        maze: The grid.
+        starts: The start position of each agent.
+        goals: The goal position of each agent.
+        suboptimality: The factor w >= 1 the total cost may exceed the
+            optimum by.
+        max_nodes: The most high-level nodes to expand before giving up.
+        time_limit: Seconds to run before giving up, or None.
+
+    Returns:
+        A MAPFResult.
+    """
+    return _search(maze, starts, goals, suboptimality, max_nodes, time_limit)
@@ -0,0 +1,113 @@
+"""
+Process-pool path queries against a maze held in shared memory.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import BatchResult, QueryPlanner
+from .grid import Grid
+
+_worker = {}  # per-process shared memory handle and planner
+
+
+def _init_worker(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    maze = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker['shm'] = shm
+    _worker['planner'] = QueryPlanner(Grid(maze))
+
+
+def _solve_chunk(chunk):
+    planner = _worker['planner']
+    results = []
+    for i, start, end in chunk:
+        path, cost = planner.query(start, end)
+        results.append((i, planner.grid.positions(path), cost))
+    return results
+
+
+class ParallelPlanner:
+    """
+    Answers path queries on a pool of worker processes.
+
+    The maze is copied into a shared memory block once; every worker maps
+    it and builds its own Grid and QueryPlanner when it starts, so queries
+    only send the (start, end) pairs across processes.
+
+    Use it as a context manager, or call close() to stop the workers and
+    free the shared memory.
+
+    Attributes:
+        shape: The shape of the maze.
+        processes: The number of worker processes.
+    """
+    def __init__(self, maze, processes=None, chunksize=64):
+        maze = np.ascontiguousarray(maze)
+        self.shape = maze.shape
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(maze.nbytes, 1))
+        np.ndarray(maze.shape, dtype=maze.dtype, buffer=self._shm.buf)[...] = maze
+        self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                          initargs=(self._shm.name, maze.shape, maze.dtype.str))
+
+    def _chunks(self, pairs):
+        chunk = []
+        for i, (start, end) in enumerate(pairs):
+            chunk.append((i, (int(start[0]), int(start[1])), (int(end[0]), int(end[1]))))
+            if len(chunk) == self.chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def plan_many(self, pairs):
+        """
+        Plans paths for many (start, end) pairs.
+
+        Args:
+            pairs: Iterable of (start, end) position pairs.
+
+        Returns:
+            A BatchResult with the path and cost of every pair, in
+            submission order.
+        """
+        costs = []
+        offsets = [0]
+        cells = []
+        for results in self._pool.imap(_solve_chunk, self._chunks(pairs)):
+            for _, path, cost in results:
+                costs.append(cost)
+                cells.append(path)
+                offsets.append(offsets[-1] + len(path))
+        cells = np.concatenate(cells) if cells else np.zeros((0, 2), dtype=np.int32)
+        return BatchResult(np.asarray(costs, dtype=np.float64), np.asarray(offsets, dtype=np.int64), cells)
+
+    def imap_unordered(self, pairs):
+        """
+        Plans paths for many (start, end) pairs, yielding them as they finish.
+
+        Args:
+            pairs: Iterable of (start, end) position pairs.
+
+        Yields:
+            (i, path, cost) tuples, where i is the position of the pair in
+            `pairs` and path is an int32 array of (row, column) positions.
+        """
+        for results in self._pool.imap_unordered(_solve_chunk, self._chunks(pairs)):
+            yield from results
+
+    def close(self):
+        """Stops the workers and releases the shared memory."""
+        self._pool.close()
+        self._pool.join()
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
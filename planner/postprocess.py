@@ -0,0 +1,149 @@
+"""
+Post-processing of planned paths into compact waypoint arrays.
+
+A grid path lists every cell it passes, while a controller only needs the
+points where it turns. The stages below shrink a path step by step:
+
+    compress_path   drops the points in the middle of straight runs.
+    shortcut_path   string-pulling: from each waypoint, jumps to the
+                    farthest later waypoint in line of sight, tested in
+                    batches with any_angle.line_of_sight.
+    spline_path     optionally rounds the corners with a Catmull-Rom
+                    spline through the waypoints. A curved segment that
+                    would clip an obstacle stays straight.
+
+postprocess_path runs them in order. Waypoints come back as an (n, 2)
+numpy array, int16 on maps that fit, instead of a list of tuples, which
+is what makes them cheap to store and send.
+"""
+import math
+
+import numpy as np
+
+from .any_angle import line_of_sight
+
+
+def _dtype(shape):
+    """Returns the smallest integer dtype that holds positions on a map."""
+    return np.int16 if max(shape, default=0) <= np.iinfo(np.int16).max else np.int32
+
+
+def compress_path(path, dtype=np.int32):
+    """
+    Removes the points in the middle of straight runs.
+
+    Points are kept where the direction changes, found for the whole
+    path at once from the cross product of consecutive steps. Steps of
+    any length work, so any-angle paths can be compressed too.
+
+    Args:
+        path: A list of (row, column) positions, or an (n, 2) array.
+        dtype: The integer dtype of the result.
+
+    Returns:
+        An (m, 2) array of the start, the turning points and the end.
+    """
+    points = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    if len(points) > 2:
+        steps = np.diff(points, axis=0)
+        before, after = steps[:-1], steps[1:]
+        cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+        dot = (before * after).sum(axis=1)
+        straight = (cross == 0) & (dot > 0)
+        points = points[np.concatenate([[True], ~straight, [True]])]
+    return points.astype(dtype)
+
+
+def shortcut_path(maze, path, window=64, dtype=None):
+    """
+    Shortcuts a path between waypoints that can see each other.
+
+    From each waypoint, the rays to the next `window` waypoints are cast
+    in one batch, and the path jumps to the farthest one in sight. The
+    Euclidean length never grows. Diagonal lines may pass between two
+    obstacles that only touch at a corner, as moves of generate_children
+    do.
+
+    Args:
+        maze: The grid the path was planned on.
+        path: A list of (row, column) positions, or an (n, 2) array.
+        window: How many waypoints ahead to test at each step.
+        dtype: The integer dtype of the result; the smallest that fits the
+            maze by default.
+
+    Returns:
+        An (m, 2) array of waypoints.
+    """
+    blocked = np.asarray(maze) != 0
+    points = compress_path(path, np.int64)
+    if not len(points):
+        return points.astype(dtype or _dtype(blocked.shape))
+    keep = [0]
+    current = 0
+    while current < len(points) - 1:
+        candidates = points[current + 1:current + 1 + window]
+        visible = np.flatnonzero(line_of_sight(blocked, points[current], candidates))
+        # consecutive waypoints always see each other, as the path ran
+        # straight between them
+        current += 1 + (int(visible[-1]) if len(visible) else 0)
+        keep.append(current)
+    return points[keep].astype(dtype or _dtype(blocked.shape))
+
+
+def spline_path(maze, waypoints, spacing=0.5):
+    """
+    Rounds the corners of a waypoint path with a Catmull-Rom spline.
+
+    The spline passes through every waypoint. Each segment is sampled at
+    most `spacing` cells apart, and a segment that would cross a blocked
+    cell is kept straight instead, which the waypoints guarantee is clear
+    when they come from shortcut_path.
+
+    Args:
+        maze: The grid the path was planned on.
+        waypoints: An (n, 2) array of waypoints.
+        spacing: The largest distance between samples, in cells.
+
+    Returns:
+        A float32 (m, 2) array of points along the curve, waypoints
+        included.
+    """
+    blocked = np.asarray(maze) != 0
+    points = np.asarray(waypoints, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 3:
+        return points.astype(np.float32)
+    # the end points are repeated so every segment has a neighbour on both sides
+    padded = np.concatenate([points[:1], points, points[-1:]])
+    rows, cols = blocked.shape
+    samples = [points[:1]]
+    for k in range(len(points) - 1):
+        p0, p1, p2, p3 = padded[k:k + 4]
+        count = max(1, math.ceil(np.linalg.norm(p2 - p1) / spacing))
+        t = (np.arange(1, count + 1) / count)[:, None]
+        curve = 0.5 * (2 * p1 + (p2 - p0) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t ** 2
+                       + (3 * p1 - p0 - 3 * p2 + p3) * t ** 3)
+        cells = np.rint(curve).astype(np.int64)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < rows) & (cells[:, 1] >= 0) & (cells[:, 1] < cols)
+        if not inside.all() or blocked[cells[:, 0], cells[:, 1]].any():
+            curve = p1 + (p2 - p1) * t
+        samples.append(curve)
+    return np.concatenate(samples).astype(np.float32)
+
+
+def postprocess_path(maze, path, spline=False, window=64, spacing=0.5):
+    """
+    Turns a planned path into a compact waypoint array.
+
+    Args:
+        maze: The grid the path was planned on.
+        path: A list of (row, column) positions, as returned by astar.
+        spline: Whether to round the corners with spline_path.
+        window: The shortcut window, see shortcut_path.
+        spacing: The spline sample spacing, see spline_path.
+
+    Returns:
+        An (m, 2) integer array of waypoints, or a float32 array of curve
+        points with spline=True.
+    """
+    waypoints = shortcut_path(maze, path, window)
+    return spline_path(maze, waypoints, spacing) if spline else waypoints
@@ -0,0 +1,193 @@
+"""
+Planning around moving obstacles with Safe Interval Path Planning (SIPP).
+
+Doors, conveyors and other moving obstacles occupy cells at known times.
+A space-time A* would have a node per cell and time step, so its cost
+grows with the length of the schedule. SIPP merges the free time steps of
+a cell into safe intervals. A search node is a cell together with one of
+its safe intervals, reached at the earliest time possible. Arriving
+earlier is never worse, so one node per interval is enough, and the work
+grows with the number of intervals instead of the number of steps.
+
+Time is measured in steps of one straight move, so a diagonal move takes
+1.4 steps. Waiting costs 10 per step, like a straight move, which makes
+the cost of a path 10 times its arrival time. A move holds both of its
+cells for its whole duration, so a path never swaps places with an
+obstacle or cuts through one that enters a cell the moment the agent
+leaves it. Inside the search, times are kept in cost units, which keeps
+them exact integers.
+"""
+from heapq import heappop, heappush
+
+import numpy as np
+
+from .grid import Grid
+from .heuristics import octile
+
+INF = float('inf')
+
+# time units per step; a straight move takes 10, a diagonal 14
+SCALE = 10
+
+
+class ObstacleSchedule:
+    """
+    Times at which moving obstacles occupy cells.
+
+    Attributes:
+        intervals: Dict of (row, column): sorted, non-overlapping list of
+            (start, end) occupied intervals in steps, end exclusive; end
+            may be inf for an obstacle that never leaves.
+    """
+    def __init__(self, intervals=None):
+        self.intervals = {}
+        for position, spans in (intervals or {}).items():
+            for start, end in spans:
+                self.add(position, start, end)
+
+    def __len__(self):
+        return sum(len(spans) for spans in self.intervals.values())
+
+    def add(self, position, start, end):
+        """Marks a cell occupied from step start up to, but not including, step end."""
+        position = (int(position[0]), int(position[1]))
+        spans = sorted(self.intervals.get(position, []) + [(start, end)])
+        merged = [spans[0]]
+        for span_start, span_end in spans[1:]:
+            if span_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], span_end))
+            else:
+                merged.append((span_start, span_end))
+        self.intervals[position] = merged
+
+    @classmethod
+    def from_occupancy(cls, occupied):
+        """
+        Builds a schedule from occupied (step, row, column) triples.
+
+        Runs of consecutive steps in one cell become a single interval.
+
+        Args:
+            occupied: Boolean (steps, rows, columns) occupancy array, or
+                an (n, 3) integer array of occupied (step, row, column).
+
+        Returns:
+            An ObstacleSchedule.
+        """
+        occupied = np.asarray(occupied)
+        if occupied.dtype == bool and occupied.ndim == 3:
+            occupied = np.argwhere(occupied)
+        schedule = cls()
+        if not len(occupied):
+            return schedule
+        steps, rows, cols = occupied[:, 0], occupied[:, 1], occupied[:, 2]
+        order = np.lexsort((steps, cols, rows))
+        steps, rows, cols = steps[order], rows[order], cols[order]
+        # a run breaks where the cell changes or a step is skipped
+        breaks = np.flatnonzero((rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1]) | (steps[1:] > steps[:-1] + 1)) + 1
+        starts = np.concatenate([[0], breaks])
+        ends = np.concatenate([breaks, [len(steps)]]) - 1
+        for first, last in zip(starts.tolist(), ends.tolist()):
+            position = (int(rows[first]), int(cols[first]))
+            schedule.intervals.setdefault(position, []).append((int(steps[first]), int(steps[last]) + 1))
+        return schedule
+
+    def safe_intervals(self, position):
+        """Returns the (start, end) intervals in steps when a cell is free of obstacles."""
+        safe = []
+        free_from = 0
+        for start, end in self.intervals.get((position[0], position[1]), ()):
+            if start > free_from:
+                safe.append((free_from, start))
+            free_from = max(free_from, end)
+        if free_from < INF:
+            safe.append((free_from, INF))
+        return safe
+
+
+def sipp(maze, start, end, schedule, start_time=0):
+    """
+    Finds the cheapest path around scheduled obstacles, waiting where needed.
+
+    Args:
+        maze: The grid of static walls.
+        start: The start position.
+        end: The end position; the agent stays there once it arrives, so
+            it must be free from the arrival on.
+        schedule: The ObstacleSchedule of the moving obstacles.
+        start_time: The step at which the agent stands on the start.
+
+    Returns:
+        The positions of the path, the step at which the agent is at each
+        of them, and the cost. A wait shows as the position repeated with
+        the step the agent leaves it. The lists are empty and the cost inf
+        if no safe path exists.
+    """
+    grid = Grid(maze)
+    free, neighbours = grid.free, grid.neighbours
+    source, target = grid.index(start), grid.index(end)
+    target_position = grid.position(target)
+    now = int(round(start_time * SCALE))
+
+    safe = {}  # padded index: safe intervals in time units
+
+    def intervals(index):
+        spans = safe.get(index)
+        if spans is None:
+            spans = safe[index] = [(lo * SCALE, hi * SCALE) for lo, hi in
+                                   schedule.safe_intervals(grid.position(index))]
+        return spans
+
+    if not free[source] or not free[target]:
+        return [], [], INF
+    first = next((k for k, (lo, hi) in enumerate(intervals(source)) if lo <= now < hi), None)
+    if first is None:
+        return [], [], INF
+
+    arrival = {(source, first): now}
+    parents = {(source, first): None}  # state: (parent state, time it left the parent)
+    closed = set()
+    heap = [(now + octile(grid.position(source), target_position), now, source, first)]
+    while heap:
+        _, time, cell, interval = heappop(heap)
+        state = (cell, interval)
+        if state in closed:
+            continue
+        closed.add(state)
+        leave_by = intervals(cell)[interval][1]
+        if cell == target and leave_by == INF:
+            return _timed_path(grid, parents, state, arrival) + (time - now,)
+
+        for offset, duration in neighbours:
+            child = cell + offset
+            if not free[child]:
+                continue
+            for k, (lo, hi) in enumerate(intervals(child)):
+                if lo + duration >= leave_by:
+                    break  # cannot wait here long enough for later intervals
+                depart = max(time, lo)
+                if depart + duration >= leave_by or depart + duration >= hi:
+                    continue
+                child_state = (child, k)
+                child_time = depart + duration
+                if child_state in closed or child_time >= arrival.get(child_state, INF):
+                    continue
+                arrival[child_state] = child_time
+                parents[child_state] = (state, depart)
+                heappush(heap, (child_time + octile(grid.position(child), target_position), child_time, child, k))
+    return [], [], INF
+
+
+def _timed_path(grid, parents, state, arrival):
+    """Returns the positions and steps from the start to a state, waits included."""
+    path, times = [], []
+    while state is not None:
+        cell = state[0]
+        parent = parents[state]
+        path.append(grid.position(cell))
+        times.append(arrival[state] / SCALE)
+        if parent is not None and parent[1] > arrival[parent[0]]:
+            path.append(grid.position(parent[0][0]))  # waited before leaving the parent
+            times.append(parent[1] / SCALE)
+        state = parent[0] if parent is not None else None
+    return path[::-1], times[::-1]
@@ -0,0 +1,104 @@
+"""
+Weighted terrain: per-cell traversal costs instead of walls only.
+
+A cost layer gives every cell a multiplier on the 10/14 move costs: 1 is
+plain ground, 2.5 is mud that takes two and a half times as long, and so
+on. A move costs its base cost times the mean of the two cells it joins,
+so crossing a boundary is charged half to each side. Cells with a cost of
+0, a negative cost or a cost that is not finite are impassable. That
+makes 0 the wall value of uint16 layers, which cannot hold inf.
+
+The cost of every move out of every cell is computed once, with a whole
+array operation per move direction. The search then reads edge costs
+from a table, just as it reads the fixed 10/14.
+
+Every move costs at least its base cost times the cheapest cell cost. A
+heuristic that bounds the move costs of plain ground therefore stays
+admissible and consistent when it is scaled by that minimum, and this is
+what astar does when it is given a Terrain.
+"""
+import numpy as np
+
+from .grid import MOVES, Grid
+
+INF = float('inf')
+
+
+class Terrain:
+    """
+    Cost layer of a maze with the cost of every move precomputed.
+
+    Args:
+        costs: (rows, columns) float or integer array of cell costs.
+        maze: Optional grid whose non-zero cells are walls as well.
+
+    Attributes:
+        shape: The (rows, columns) shape of the layer.
+        costs: The float64 cell costs, inf for impassable cells.
+        grid: The padded Grid of the impassable cells.
+        edges: float64 (8, padded cells) array; edges[k, i] is the cost
+            of grid.neighbours[k] out of padded cell i, inf where either
+            end is impassable.
+        min_cost: The cheapest passable cell cost, the heuristic scale.
+    """
+    def __init__(self, costs, maze=None):
+        costs = np.asarray(costs, dtype=np.float64)
+        passable = np.isfinite(costs) & (costs > 0)
+        if maze is not None:
+            passable &= np.asarray(maze) == 0
+        self.shape = costs.shape
+        self.costs = np.where(passable, costs, INF)
+        self.grid = Grid(~passable)
+        self.min_cost = float(self.costs[passable].min()) if passable.any() else 1.0
+        self.edges = self._edges()
+        # scalar reads in the search loop are far cheaper on lists
+        self._edge_lists = [edge.tolist() for edge in self.edges]
+        # cell id offset of each move, in the order of grid.neighbours
+        self._moves = [(k, d_row * self.shape[1] + d_col) for k, ((d_row, d_col), _) in enumerate(MOVES)]
+
+    def _edges(self):
+        """Computes the cost of every move out of every cell, one direction at a time."""
+        grid = self.grid
+        rows, cols = self.shape
+        padded = np.full((rows + 2, grid.width), INF)
+        padded[1:-1, 1:-1] = self.costs
+        flat = padded.ravel()
+        edges = np.full((len(grid.neighbours), grid.size), INF)
+        for k, (offset, base) in enumerate(grid.neighbours):
+            # the border is impassable, so only border cells would move off
+            # the ends of the flat array, and those stay inf
+            source = slice(max(0, -offset), grid.size - max(0, offset))
+            target = slice(max(0, offset), grid.size - max(0, -offset))
+            edges[k, source] = base * (flat[source] + flat[target]) / 2
+        return edges
+
+    def cost(self, position):
+        """Returns the cost of a cell, inf if it is impassable."""
+        return float(self.costs[position[0], position[1]])
+
+    def scaled(self, heuristic):
+        """Returns the heuristic scaled to the cheapest cell, admissible on this terrain."""
+        min_cost = self.min_cost
+        return lambda position, end: min_cost * heuristic(position, end)
+
+    def children(self, state, index):
+        """
+        Generates the children of a cell with their terrain move costs.
+
+        Args:
+            state: The search state, indexed by row * cols + col.
+            index: The cell id to generate the children for.
+
+        Returns:
+            A list of (child cell id, move cost) pairs for the passable
+            neighbours, like core.generate_children.
+        """
+        row, col = divmod(index, self.shape[1])
+        padded = (row + 1) * self.grid.width + col + 1
+        edges = self._edge_lists
+        children = []
+        for k, offset in self._moves:
+            cost = edges[k][padded]
+            if cost != INF:
+                children.append((index + offset, cost))
+        return children
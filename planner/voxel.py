@@ -0,0 +1,159 @@
+"""
+Grid search in any number of dimensions, for 3D occupancy volumes.
+
+The 2D planners index cells as row * cols + col and check eight fixed
+moves. A 512^3 volume needs the same idea in N dimensions, with two
+changes to keep it tractable:
+
+    occupancy  is padded with a wall border and bit-packed, one bit per
+               voxel, so a 512^3 volume takes 17 MB instead of 135 MB as
+               bytes. Free checks read the bit of a flat index directly.
+    search     state lives in dicts keyed by flat index, so memory grows
+               with the cells the search touches rather than with the
+               volume.
+
+The moves are all 3^N - 1 neighbours (26 in 3D), precomputed once as flat
+offsets. A move costs 10 * sqrt(k) rounded, where k is the number of axes
+it changes: 10, 14 and 17 in 3D. As in 2D, diagonal moves may cut past
+corners. The heuristic generalises octile: with the absolute coordinate
+differences sorted descending as d1 >= d2 >= ... >= dN, it charges the
+k-axis move cost for the d_k - d_(k+1) moves that change k axes, which is
+the exact cost on an empty grid.
+"""
+from heapq import heappop, heappush
+from itertools import product
+from math import sqrt
+
+import numpy as np
+
+INF = float('inf')
+
+
+class VoxelGrid:
+    """
+    N-dimensional occupancy padded with a wall border, flattened and bit-packed.
+
+    Args:
+        occupancy: N-dimensional array; non-zero voxels are obstacles.
+
+    Attributes:
+        shape: The shape of the original volume.
+        strides: The flat index step of each axis in the padded volume.
+        bits: The packed obstacle bitmap of the padded volume, one bit per
+            voxel in little-endian bit order.
+        neighbours: (flat offset, cost) pairs of the 3^N - 1 moves.
+        axis_costs: axis_costs[k] is the cost of a move along k + 1 axes.
+    """
+    def __init__(self, occupancy):
+        blocked = np.pad(np.asarray(occupancy) != 0, 1, constant_values=True)
+        self.shape = tuple(size - 2 for size in blocked.shape)
+        strides = []
+        stride = 1
+        for size in reversed(blocked.shape):
+            strides.append(stride)
+            stride *= size
+        self.strides = strides[::-1]
+        self.size = stride
+        self.bits = np.packbits(blocked.ravel(), bitorder='little').tobytes()
+        dimensions = len(self.shape)
+        self.axis_costs = [round(10 * sqrt(k)) for k in range(1, dimensions + 1)]
+        # the extra cost of changing one more axis: 10, 4, 3 in 3D
+        self._steps = [cost - previous for cost, previous in zip(self.axis_costs, [0] + self.axis_costs)]
+        self.neighbours = []
+        for move in product((-1, 0, 1), repeat=dimensions):
+            axes = sum(1 for step in move if step)
+            if axes:
+                offset = sum(step * stride for step, stride in zip(move, self.strides))
+                self.neighbours.append((offset, self.axis_costs[axes - 1]))
+        # straight moves first, like the 2D move tables
+        self.neighbours.sort(key=lambda move: move[1])
+
+    @property
+    def nbytes(self):
+        """The memory taken by the packed occupancy."""
+        return len(self.bits)
+
+    def index(self, position):
+        """Returns the flat padded index of a position."""
+        return sum((int(coordinate) + 1) * stride for coordinate, stride in zip(position, self.strides))
+
+    def position(self, index):
+        """Returns the position of a flat padded index."""
+        position = []
+        for stride in self.strides:
+            coordinate, index = divmod(index, stride)
+            position.append(coordinate - 1)
+        return tuple(position)
+
+    def is_free(self, index):
+        """Checks if the voxel at a flat padded index is free."""
+        return not (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def heuristic(self, a, b):
+        """Returns the cost between two positions on an empty grid."""
+        differences = sorted((abs(x - y) for x, y in zip(a, b)), reverse=True)
+        return sum(step * difference for step, difference in zip(self._steps, differences))
+
+    def estimator(self, end):
+        """Returns heuristic(position, end) as a function of flat padded indices, for the search loop."""
+        strides, steps = self.strides, self._steps
+        target = [coordinate + 1 for coordinate in end]
+
+        def estimate(index):
+            differences = []
+            for stride, coordinate in zip(strides, target):
+                here, index = divmod(index, stride)
+                differences.append(abs(here - coordinate))
+            differences.sort(reverse=True)
+            return sum(step * difference for step, difference in zip(steps, differences))
+        return estimate
+
+
+def voxel_astar(volume, start, end):
+    """
+    Finds the shortest path through an N-dimensional volume with A*.
+
+    Args:
+        volume: The occupancy array, or a VoxelGrid built from it.
+        start: The start position, one coordinate per axis.
+        end: The end position.
+
+    Returns:
+        The list of positions from the start to the end and the path cost,
+        or an empty list and inf if the end cannot be reached.
+    """
+    grid = volume if isinstance(volume, VoxelGrid) else VoxelGrid(volume)
+    bits, neighbours = grid.bits, grid.neighbours
+    source, target = grid.index(start), grid.index(end)
+    if not grid.is_free(source) or not grid.is_free(target):
+        return [], INF
+    estimate = grid.estimator(end)
+
+    g = {source: 0}
+    parent = {source: -1}
+    closed = set()
+    heap = [(estimate(source), source)]
+    while heap:
+        _, current = heappop(heap)
+        if current in closed:
+            continue  # stale entry superseded by a cheaper push
+        closed.add(current)
+        if current == target:
+            path = []
+            while current >= 0:
+                path.append(grid.position(current))
+                current = parent[current]
+            return path[::-1], g[target]
+
+        current_g = g[current]
+        for offset, cost in neighbours:
+            child = current + offset
+            if (bits[child >> 3] >> (child & 7)) & 1:
+                continue
+            child_g = current_g + cost
+            if child_g >= g.get(child, INF):
+                continue  # also skips closed cells, whose g is final with a consistent heuristic
+            g[child] = child_g
+            parent[child] = current
+            heappush(heap, (child_g + estimate(child), child))
+    return [], INF
@@ -0,0 +1,314 @@
+"""
+Windowed Hierarchical Cooperative A* (WHCA*) for streams of agents.
+
+Agents plan one after another against a shared reservation table keyed on
+(row, column, time). Each plan only looks `window` steps ahead in space
+and time. Past the window, the remaining cost is taken from the true
+distance to the goal, so the cost of a plan grows with the window rather
+than with the path. An agent follows its plan for `replan` steps, then
+plans the next window from where it stands. New agents spread their first
+replan over those steps, so the work per tick stays flat.
+
+The true distances come from a Reverse Resumable A* (RRA*) per goal. It
+searches backwards from the goal and only resumes when an agent asks for
+a cell it has not reached yet, so a goal costs no more than the cells its
+agents actually pass near.
+
+Unlike cbs, this is not complete or optimal: an agent planned later has
+to go around the reservations of the ones planned before it. In return it
+never searches the joint space, and agents can join and leave between
+ticks. An agent keeps holding the last cell of its plan until it plans
+again, so the agents never collide; an agent resting on its goal in a
+corridor blocks it for the others.
+"""
+from heapq import heappop, heappush
+
+from .grid import MOVES, Grid
+from .heuristics import octile
+
+INF = float('inf')
+WAIT_COST = 10
+
+
+class ReservationTable:
+    """
+    Space-time cells claimed by the agents.
+
+    Attributes:
+        cells: Dict of (row, column, time): agent for every reserved cell.
+        holds: Dict of (row, column): (time, agent) for the cells agents
+            stay in from that time on, until they plan again.
+    """
+    def __init__(self):
+        self.cells = {}
+        self.holds = {}
+        self._times = {}  # time: keys reserved at that time, for expire()
+        self._oldest = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def owner(self, row, col, t):
+        """Returns the agent holding a cell at a time, or None."""
+        agent = self.cells.get((row, col, t))
+        if agent is None:
+            hold = self.holds.get((row, col))
+            if hold is not None and t >= hold[0]:
+                agent = hold[1]
+        return agent
+
+    def reserve(self, agent, path, t):
+        """
+        Reserves a path for an agent and holds its last cell afterwards.
+
+        Args:
+            agent: The agent id.
+            path: The (row, column) positions at times t, t + 1, ...
+            t: The time of the first position.
+        """
+        cells, times = self.cells, self._times
+        for row, col in path:
+            cells[(row, col, t)] = agent
+            times.setdefault(t, []).append((row, col, t))
+            t += 1
+        self.holds[path[-1]] = (t, agent)
+
+    def release(self, agent, path, t, since):
+        """
+        Frees the cells an agent reserved for a path from a time on.
+
+        Args:
+            agent: The agent id.
+            path: The path the agent reserved.
+            t: The time of the first position of the path.
+            since: The first time to free.
+        """
+        cells = self.cells
+        for row, col in path[max(since - t, 0):]:
+            key = (row, col, max(t, since))
+            if cells.get(key) == agent:
+                del cells[key]
+            t = key[2] + 1
+        hold = self.holds.get(path[-1])
+        if hold is not None and hold[1] == agent:
+            del self.holds[path[-1]]
+
+    def expire(self, now):
+        """Drops the reservations of times before now."""
+        cells, times = self.cells, self._times
+        for t in range(self._oldest, now):
+            for key in times.pop(t, ()):
+                cells.pop(key, None)
+        self._oldest = max(self._oldest, now)
+
+
+class _TrueDistance:
+    """Reverse Resumable A*: exact costs to one goal, searched as they are asked for."""
+    def __init__(self, grid, goal, origin):
+        self.grid = grid
+        self.width = grid.width
+        self.origin = divmod(origin, self.width)
+        self.closed = {}
+        self.g = {goal: 0}
+        self.heap = [(self._h(goal), 0, goal)]
+
+    def _h(self, index):
+        return octile(divmod(index, self.width), self.origin)
+
+    def __call__(self, index):
+        distance = self.closed.get(index)
+        if distance is not None:
+            return distance
+        free, neighbours, closed, g, heap = self.grid.free, self.grid.neighbours, self.closed, self.g, self.heap
+        while heap:
+            _, cost, current = heappop(heap)
+            if current in closed:
+                continue
+            closed[current] = cost
+            for offset, step in neighbours:
+                child = current + offset
+                if free[child] and child not in closed and cost + step < g.get(child, INF):
+                    g[child] = cost + step
+                    heappush(heap, (cost + step + self._h(child), cost + step, child))
+            if current == index:
+                return cost
+        return INF
+
+
+class _Agent:
+    __slots__ = ('goal', 'path', 'since', 'due', 'fresh')
+
+    def __init__(self, start, now):
+        self.goal = None
+        self.path = [start]  # planned positions from time since on
+        self.since = now
+        self.due = now  # time of the next plan
+        self.fresh = True
+
+
+class WindowedPlanner:
+    """
+    Plans and moves a changing set of agents one tick at a time.
+
+    Args:
+        maze: The grid.
+        window: How many steps ahead each plan looks.
+        replan: How many steps an agent follows a plan before planning
+            again; at most window, window // 2 by default.
+
+    Attributes:
+        reservations: The shared ReservationTable.
+        time: The current tick.
+        expanded: Space-time nodes expanded by all plans so far.
+    """
+    def __init__(self, maze, window=16, replan=None):
+        self.grid = Grid(maze)
+        self.window = window
+        self.replan = max(1, min(replan or window // 2, window))
+        self.reservations = ReservationTable()
+        self.time = 0
+        self.expanded = 0
+        self._agents = {}
+        self._distances = {}  # goal index: _TrueDistance
+        self._heading = {}  # goal index: number of agents heading there
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._agents)
+
+    def add_agent(self, start, goal):
+        """
+        Adds an agent standing at start; it plans on the next tick.
+
+        The start should be free and not reserved at the current time.
+
+        Returns:
+            The agent id.
+        """
+        agent = self._next_id
+        self._next_id += 1
+        start = (int(start[0]), int(start[1]))
+        self._agents[agent] = _Agent(start, self.time)
+        self.set_goal(agent, goal)
+        self.reservations.reserve(agent, [start], self.time)
+        return agent
+
+    def set_goal(self, agent, goal):
+        """Sends an agent to a new goal; it plans again on the next tick."""
+        state = self._agents[agent]
+        if state.goal is not None:
+            self._leave(state.goal)
+        state.goal = (int(goal[0]), int(goal[1]))
+        index = self.grid.index(state.goal)
+        if index not in self._distances:
+            self._distances[index] = _TrueDistance(self.grid, index, self.grid.index(self.position(agent)))
+        self._heading[index] = self._heading.get(index, 0) + 1
+        state.due = self.time
+
+    def remove_agent(self, agent):
+        """Takes an agent off the map and frees its reservations."""
+        state = self._agents.pop(agent)
+        self.reservations.release(agent, state.path, state.since, self.time)
+        self._leave(state.goal)
+
+    def _leave(self, goal):
+        """Drops the distances to a goal once no agent heads there."""
+        index = self.grid.index(goal)
+        self._heading[index] -= 1
+        if not self._heading[index]:
+            del self._heading[index], self._distances[index]
+
+    def position(self, agent):
+        """Returns the current (row, column) position of an agent."""
+        state = self._agents[agent]
+        return state.path[min(self.time - state.since, len(state.path) - 1)]
+
+    def positions(self):
+        """Returns a dict of agent id: current position."""
+        return {agent: self.position(agent) for agent in self._agents}
+
+    def arrived(self, agent):
+        """Checks if an agent stands on its goal."""
+        return self.position(agent) == self._agents[agent].goal
+
+    def step(self):
+        """
+        Plans the agents that are due and moves every agent one step.
+
+        Returns:
+            The dict of agent id: position after the step.
+        """
+        now = self.time
+        for agent, state in self._agents.items():
+            if state.due <= now:
+                self._plan(agent, state, now)
+        self.time = now + 1
+        self.reservations.expire(self.time)
+        return self.positions()
+
+    def _plan(self, agent, state, now):
+        start = self.position(agent)
+        self.reservations.release(agent, state.path, state.since, now)
+        state.path, state.since = self._search(agent, start, state.goal, now), now
+        self.reservations.reserve(agent, state.path, now)
+        # the first plan is cut short by a different amount per agent, which
+        # spreads the replanning of agents added together over the ticks
+        state.due = now + (agent % self.replan + 1 if state.fresh else self.replan)
+        state.fresh = False
+
+    def _search(self, agent, start, goal, now):
+        """
+        Space-time A* over the next window steps against the reservations.
+
+        Returns:
+            The (row, column) positions from now to the end of the window,
+            or just the start if the agent cannot move at all.
+        """
+        grid, table = self.grid, self.reservations
+        free, width, cells, owner = grid.free, grid.width, table.cells, table.owner
+        distance = self._distances[grid.index(goal)]
+        known = distance.closed  # skips the call for distances already searched
+        if distance(grid.index(start)) == INF:
+            return [start]
+        end_time = now + self.window
+        moves = [((0, 0), WAIT_COST)] + MOVES
+
+        best = {(start, now): 0}
+        parents = {(start, now): None}
+        heap = [(distance(grid.index(start)), -now, 0, start)]
+        while heap:
+            _, negative_t, g, cell = heappop(heap)
+            t = -negative_t
+            if g > best[(cell, t)]:
+                continue
+            self.expanded += 1
+            if t == end_time:
+                path = []
+                key = (cell, t)
+                while key is not None:
+                    path.append(key[0])
+                    key = parents[key]
+                return path[::-1]
+            row, col = cell
+            for (d_row, d_col), cost in moves:
+                child = (row + d_row, col + d_col)
+                index = (child[0] + 1) * width + child[1] + 1
+                if not free[index] or owner(child[0], child[1], t + 1) not in (None, agent):
+                    continue
+                if (d_row or d_col) and cells.get((child[0], child[1], t)) not in (None, agent) \
+                        and cells.get((row, col, t + 1)) == cells.get((child[0], child[1], t)):
+                    continue  # swapping places with another agent
+                if not (d_row or d_col) and cell == goal:
+                    cost = 0
+                child_g = g + cost
+                if child_g >= best.get((child, t + 1), INF):
+                    continue
+                h = known.get(index)
+                if h is None:
+                    h = distance(index)
+                if h == INF:
+                    continue
+                best[(child, t + 1)] = child_g
+                parents[(child, t + 1)] = (cell, t)
+                heappush(heap, (child_g + h, -(t + 1), child_g, child))
+        return [start]
@@ -210,7 +210,8 @@ class MainWindow(QMainWindow):
                 item.setBackground(QColor('white'))
                 item.setText('')  # clear text to make it more better
 
-app = QApplication([]) 
-window = MainWindow() 
-window.show() 
-app.exec_()
\ No newline at end of file
+if __name__ == '__main__':
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec_()
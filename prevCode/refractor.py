@@ -27,6 +27,29 @@ class Node:
         """Checks if this node is equal to another node (based on their positions)."""
         return self.position == other.position
 
+class ClosedList(list):
+    """
+    List of the nodes that have been evaluated, in expansion order.
+
+    The positions are mirrored in a set so that membership tests are a hash
+    lookup instead of comparing against every closed node.
+
+    Attributes:
+        positions: The set of positions of the nodes in the list.
+    """
+    def __init__(self, nodes=()):
+        super().__init__(nodes)
+        self.positions = {node.position for node in self}
+
+    def append(self, node):
+        """Appends a node and records its position."""
+        super().append(node)
+        self.positions.add(node.position)
+
+    def __contains__(self, node):
+        """Checks if a node with the same position has been evaluated."""
+        return node.position in self.positions
+
 def generate_children(node, maze):
     """
     Generates the children of a node.
@@ -72,7 +95,9 @@ def astar(maze, start, end, open_list=None, closed_list=None):
     if open_list is None: 
         open_list = [] 
     if closed_list is None: 
-        closed_list = []
+        closed_list = ClosedList()
+    elif not isinstance(closed_list, ClosedList):
+        closed_list = ClosedList(closed_list)
 
     if len(open_list) == 0:  # start a new search
         start_node = Node(None, start)
@@ -157,7 +182,7 @@ class MainWindow(QMainWindow):
         self.end = None 
         self.maze = np.zeros((10, 10)) 
         self.open_list = [] 
-        self.closed_list = [] 
+        self.closed_list = ClosedList() 
         self.path_found = False 
         self.timer = QTimer(self) 
         self.timer.setInterval(500) # set time interval to make it faster or slower
@@ -274,7 +299,7 @@ class MainWindow(QMainWindow):
         self.end = None
         self.maze = np.zeros((10, 10))
         self.open_list = []
-        self.closed_list = []
+        self.closed_list = ClosedList()
         self.path_found = False
         self.find_path_button.setEnabled(True)
         self.next_button.setEnabled(False)  # disable Next button when grid is reset
@@ -288,7 +313,8 @@ class MainWindow(QMainWindow):
                 item.setBackground(QColor('white'))
                 item.setText('')  # clear text to make it more better
 
-app = QApplication([]) 
-window = MainWindow() 
-window.show() 
-app.exec_()
\ No newline at end of file
+if __name__ == '__main__':
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec_()
@@ -16,11 +16,29 @@ class Node:
     def __eq__(self, other):
         return self.position == other.position
 
+class ClosedList(list):
+    """
+    Evaluated nodes in expansion order, with their positions kept in a set
+    so `node in closed_list` is a hash lookup rather than a scan.
+    """
+    def __init__(self, nodes=()):
+        super().__init__(nodes)
+        self.positions = {node.position for node in self}
+
+    def append(self, node):
+        super().append(node)
+        self.positions.add(node.position)
+
+    def __contains__(self, node):
+        return node.position in self.positions
+
 def astar(maze, start, end, open_list=None, closed_list=None): 
     if open_list is None: 
         open_list = [] 
     if closed_list is None: 
-        closed_list = []
+        closed_list = ClosedList()
+    elif not isinstance(closed_list, ClosedList):
+        closed_list = ClosedList(closed_list)
 
     if len(open_list) == 0:  # start a new search
         start_node = Node(None, start)
@@ -100,7 +118,7 @@ class MainWindow(QMainWindow):
         self.end = None 
         self.maze = np.zeros((10, 10)) 
         self.open_list = [] 
-        self.closed_list = [] 
+        self.closed_list = ClosedList() 
         self.path_found = False 
         self.timer = QTimer(self) 
         self.timer.setInterval(500) # set time interval to make it faster or slower
@@ -198,7 +216,7 @@ class MainWindow(QMainWindow):
         self.end = None
         self.maze = np.zeros((10, 10))
         self.open_list = []
-        self.closed_list = []
+        self.closed_list = ClosedList()
         self.path_found = False
         self.find_path_button.setEnabled(True)
         self.next_button.setEnabled(False)  # disable Next button when grid is reset
@@ -212,7 +230,8 @@ class MainWindow(QMainWindow):
                 item.setBackground(QColor('white'))
                 item.setText('')  # clear text to make it more better
 
-app = QApplication([]) 
-window = MainWindow() 
-window.show() 
-app.exec_()
\ No newline at end of file
+if __name__ == '__main__':
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    app.exec_()